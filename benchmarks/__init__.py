@@ -0,0 +1 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
@@ -0,0 +1,215 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+# microbenchmarks of the event bus in modules/base
+#   python -m benchmarks.event_bus [--output FILE] [--events N] [--reactor]
+
+import asyncio
+import gc
+import json
+import platform
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+import click
+
+from cloudcutter.modules.base import RUNTIME, BaseEvent, ModuleBase, subscribe
+from cloudcutter.modules.base.index import SUBSCRIBERS
+
+from .module_thread import measure as measure_module_thread
+
+
+@dataclass
+class BenchEvent(BaseEvent):
+    value: int
+    timestamp: float = 0.0
+
+
+class Counter(ModuleBase):
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+
+class TypeSubscriber(Counter):
+    @subscribe(BenchEvent)
+    async def on_event(self, event: BenchEvent) -> None:
+        self.count += 1
+
+
+class KeySubscriber(Counter):
+    @subscribe(BenchEvent, key="value", value=1)
+    async def on_event(self, event: BenchEvent) -> None:
+        self.count += 1
+
+
+# only used for matching - never broadcast
+VALUE = BenchEvent(1)
+setattr(VALUE, "__used__", True)
+
+
+class ValueSubscriber(Counter):
+    @subscribe(VALUE)
+    async def on_event(self, event: BenchEvent) -> None:
+        self.count += 1
+
+
+class LatencySubscriber(ModuleBase):
+    future: asyncio.Future = None
+
+    @subscribe(BenchEvent)
+    async def on_event(self, event: BenchEvent) -> None:
+        self.resolve_future(self.future, perf_counter() - event.timestamp)
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    samples = sorted(samples)
+    return dict(
+        mean_us=sum(samples) / len(samples) * 1e6,
+        p50_us=samples[len(samples) // 2] * 1e6,
+        p99_us=samples[int(len(samples) * 0.99)] * 1e6,
+    )
+
+
+async def start_modules(cls: type[Counter], count: int) -> list[Counter]:
+    modules = [cls() for _ in range(count)]
+    for module in modules:
+        await module.start()
+    # let run() register the subscribers
+    while any(not SUBSCRIBERS.handlers(m, BenchEvent) for m in modules):
+        await asyncio.sleep(0.01)
+    return modules
+
+
+async def bench_broadcast(cls: type[Counter], subscribers: int, events: int) -> dict:
+    # keep the total number of handler calls reasonable
+    events //= max(1, subscribers // 10)
+    modules = await start_modules(cls, subscribers)
+    start = perf_counter()
+    for i in range(events):
+        # every other event matches the key/value subscriptions
+        BenchEvent(i % 2).broadcast()
+    broadcast = perf_counter() - start
+    for module in modules:
+        await module.wait_idle()
+    delivered = perf_counter() - start
+    handled = sum(module.count for module in modules)
+    for module in modules:
+        await module.stop()
+    return dict(
+        subscribers=subscribers,
+        events=events,
+        handled=handled,
+        broadcast_per_s=events / broadcast,
+        delivered_per_s=events / delivered,
+    )
+
+
+async def bench_dispatch_latency(events: int) -> dict:
+    # from broadcast() to the handler, on the module's thread
+    (module,) = await start_modules(LatencySubscriber, 1)
+    samples = []
+    for i in range(events):
+        module.future = module.make_future()
+        BenchEvent(i, perf_counter()).broadcast()
+        samples.append(await module.future)
+    await module.stop()
+    return summarize(samples)
+
+
+async def bench_await_latency(events: int) -> dict:
+    # from broadcast() on another thread until the awaiting task resumes
+    loop = asyncio.get_running_loop()
+    samples = []
+    for i in range(events):
+        future = BenchEvent.any()
+        await loop.run_in_executor(
+            None,
+            lambda: BenchEvent(i, perf_counter()).broadcast(),
+        )
+        event = await future
+        samples.append(perf_counter() - event.timestamp)
+    return summarize(samples)
+
+
+async def bench_module_thread(calls: int) -> dict:
+    return summarize(await measure_module_thread(calls))
+
+
+def bench_queue_memory(events: int) -> dict:
+    # module isn't started, so the events stay in its queue
+    module = TypeSubscriber()
+    module.register_subscribers()
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for i in range(events):
+        BenchEvent(i).broadcast()
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    queued = module.queue.qsize()
+    module.unregister_subscribers()
+    while module.queue.get_nowait():
+        pass
+    return dict(events=queued, bytes_per_event=(after - before) / queued)
+
+
+async def run_all(events: int) -> dict:
+    results = {}
+    for subscribers in (1, 10, 100):
+        name = f"broadcast_type_{subscribers}"
+        results[name] = await bench_broadcast(TypeSubscriber, subscribers, events)
+    for cls, kind in ((KeySubscriber, "key"), (ValueSubscriber, "value")):
+        for subscribers in (1, 10, 100):
+            name = f"broadcast_{kind}_{subscribers}"
+            results[name] = await bench_broadcast(cls, subscribers, events)
+    results["dispatch_latency"] = await bench_dispatch_latency(events // 10)
+    results["await_latency"] = await bench_await_latency(events // 10)
+    results["module_thread_round_trip"] = await bench_module_thread(events // 10)
+    results["queue_memory"] = bench_queue_memory(events)
+    return results
+
+
+@click.command()
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default="bench_results.json",
+    help="Where to write the results (JSON).",
+)
+@click.option(
+    "--events",
+    type=int,
+    default=10000,
+    help="Events broadcast per throughput run.",
+)
+@click.option(
+    "--reactor",
+    is_flag=True,
+    help="Run the modules on a single event loop.",
+)
+def cli(output: Path, events: int, reactor: bool):
+    RUNTIME.reactor = reactor
+    results = asyncio.run(run_all(events))
+    for name, result in results.items():
+        values = ", ".join(
+            f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}"
+            for k, v in result.items()
+        )
+        print(f"{name:<28} {values}")
+    data = dict(
+        timestamp=datetime.now().isoformat(),
+        python=platform.python_version(),
+        platform=platform.platform(),
+        events=events,
+        reactor=reactor,
+        results=results,
+    )
+    output.write_text(json.dumps(data, indent=4))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    cli()
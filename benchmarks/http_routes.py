@@ -0,0 +1,89 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+# matching requests against HttpModule handlers, linearly (as done before
+# the route table) and with the compiled RouteTable
+#   python -m benchmarks.http_routes [routes] [lookups]
+
+import sys
+from time import perf_counter
+from typing import Any, Generator
+
+from cloudcutter.modules.http.routes import RouteTable
+from cloudcutter.modules.http.types import Request, RequestHandler
+from cloudcutter.utils import matches
+
+Handlers = list[tuple[Request, RequestHandler]]
+
+
+def linear_match(handlers: Handlers, request: Request) -> Generator[Any, Any, None]:
+    for model, func in handlers:
+        if not matches(model.method, request.method):
+            continue
+        if not matches(model.path, request.path):
+            continue
+        if model.host and not matches(model.host, request.host):
+            continue
+        if model.query:
+            if not all(
+                k in request.query and matches(v, request.query[k])
+                for k, v in model.query.items()
+            ):
+                continue
+        if model.headers:
+            if not all(
+                k in request.headers and matches(v, request.headers[k])
+                for k, v in model.headers.items()
+            ):
+                continue
+        yield model, func
+
+
+def make_handlers(count: int) -> Handlers:
+    # mostly /d.json actions, like the Tuya server has
+    handlers = [
+        (Request("POST", "/v1/url_config", r"h\d\.iot-dns\.com", None, None), "dns"),
+        (Request("GET", "/files/(.*)", None, None, None), "files"),
+    ]
+    for i in range(count - 3):
+        query = dict(a=f"tuya.device.action{i}.get")
+        handlers.append((Request("POST", "/d.json", None, query, None), i))
+    # catch-all, as in GatewayCore
+    handlers.append((Request("POST", "/d.json", None, None, None), "gateway"))
+    return handlers
+
+
+def make_requests(count: int) -> list[Request]:
+    requests = []
+    for i in range(count):
+        query = dict(a=f"tuya.device.action{i}.get", et="1")
+        requests.append(Request("POST", "/d.json", "a.tuyaeu.com", query, {}))
+    requests.append(Request("GET", "/files/fw.bin", "10.42.42.1", {}, {}))
+    requests.append(Request("POST", "/d.json", "", dict(a="unknown"), {}))
+    return requests
+
+
+def measure(name: str, match, requests: list[Request], lookups: int) -> None:
+    start = perf_counter()
+    for i in range(lookups):
+        # first match, like handle_request() does
+        next(match(requests[i % len(requests)]))
+    elapsed = perf_counter() - start
+    print(f"{name:<8} {elapsed / lookups * 1e6:8.2f} us/lookup")
+
+
+def main() -> None:
+    routes = int(sys.argv[1]) if len(sys.argv) > 1 else 120
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    handlers = make_handlers(routes)
+    requests = make_requests(routes)
+    start = perf_counter()
+    table = RouteTable(handlers)
+    print(f"{len(handlers)} routes compiled in {(perf_counter() - start) * 1e3:.1f} ms")
+    for request in requests:
+        assert list(table.match(request)) == list(linear_match(handlers, request))
+    measure("before", lambda r: linear_match(handlers, r), requests, lookups)
+    measure("after", table.match, requests, lookups)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+# round-trip latency of @module_thread calls, from the main loop
+# to a module thread and back
+#   python -m benchmarks.module_thread [calls]
+
+import asyncio
+import sys
+from asyncio import Future
+from time import perf_counter
+from typing import Any
+
+from cloudcutter.modules.base import ModuleBase, module_thread
+from cloudcutter.modules.base.future import FutureMixin
+
+
+class PingModule(ModuleBase):
+    @module_thread
+    async def ping(self) -> None:
+        pass
+
+
+def legacy_resolve_future(future: Future, result: Any = None) -> None:
+    # resolution as done before the call_soon_threadsafe() fast path
+    async def resolve():
+        future.set_result(result)
+
+    asyncio.run_coroutine_threadsafe(resolve(), future.get_loop())
+
+
+async def measure(calls: int) -> list[float]:
+    module = PingModule()
+    await module.start()
+    for _ in range(100):
+        await module.ping()  # warm up
+    samples = []
+    for _ in range(calls):
+        start = perf_counter()
+        await module.ping()
+        samples.append(perf_counter() - start)
+    await module.stop()
+    return sorted(samples)
+
+
+def report(name: str, samples: list[float]) -> None:
+    def us(value: float) -> str:
+        return f"{value * 1e6:8.1f} us"
+
+    print(
+        f"{name:<8}",
+        f"mean {us(sum(samples) / len(samples))}",
+        f"p50 {us(samples[len(samples) // 2])}",
+        f"p99 {us(samples[int(len(samples) * 0.99)])}",
+    )
+
+
+def main() -> None:
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    resolve_future = FutureMixin.__dict__["resolve_future"]
+    FutureMixin.resolve_future = staticmethod(legacy_resolve_future)
+    try:
+        report("before", asyncio.run(measure(calls)))
+    finally:
+        FutureMixin.resolve_future = resolve_future
+    report("after", asyncio.run(measure(calls)))
+
+
+if __name__ == "__main__":
+    main()
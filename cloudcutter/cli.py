@@ -1,19 +1,63 @@
 #  Copyright (c) Kuba Szczodrzyński 2023-9-2.
 
+import asyncio
 from logging import DEBUG
+from pathlib import Path
 
 import click
 from ltchiptool.util.logging import LoggingHandler
 
 from .core import Cloudcutter
+from .modules.base import LOG_QUEUE, RUNTIME, EventJournal
 
 
 @click.command()
-def cli():
+@click.option(
+    "--journal",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Record all broadcast events to a journal file.",
+)
+@click.option(
+    "--replay",
+    type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Replay a recorded journal, without using any network interfaces.",
+)
+@click.option(
+    "--replay-speed",
+    type=float,
+    default=0.0,
+    help="Replay speed (1.0 - recorded speed, 0 - as fast as possible).",
+)
+@click.option(
+    "--reactor",
+    is_flag=True,
+    help="Run all modules on a single event loop, instead of a thread each.",
+)
+def cli(
+    journal: Path | None,
+    replay: Path | None,
+    replay_speed: float,
+    reactor: bool,
+):
     logger = LoggingHandler.get()
     logger.level = DEBUG
-    cloudcutter = Cloudcutter()
-    cloudcutter.entrypoint()
+    # write logs from a background thread
+    LOG_QUEUE.start()
+    RUNTIME.reactor = reactor
+    event_journal = EventJournal(journal) if journal else None
+    if event_journal:
+        event_journal.start()
+    try:
+        cloudcutter = Cloudcutter(headless=replay is not None)
+        if replay:
+            asyncio.run(cloudcutter.replay(replay, replay_speed))
+        else:
+            cloudcutter.entrypoint()
+    finally:
+        if event_journal:
+            event_journal.stop()
+        LOG_QUEUE.stop()
+        RUNTIME.shutdown()
 
 
 if __name__ == "__main__":
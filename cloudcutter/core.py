@@ -1,23 +1,45 @@
 #  Copyright (c) Kuba Szczodrzyński 2024-3-22.
 
+from logging import DEBUG
+from pathlib import Path
+
 from .events import (
     CoreTuyaApCfgConnectCommand,
     CoreTuyaApCfgExploitCommand,
     CoreTuyaServerStartCommand,
 )
-from .modules.base import BaseEvent, ModuleBase, subscribe
+from .modules.base import (
+    BaseEvent,
+    EventLogger,
+    EventLogRule,
+    ModuleBase,
+    Overflow,
+    replay_journal,
+    subscribe,
+)
 from .modules.dhcp import DhcpModule
-from .modules.dns import DnsModule
-from .modules.http import HttpModule
-from .modules.mqtt import MqttModule
+from .modules.dns import DnsModule, DnsQueryEvent
+from .modules.http import HttpModule, HttpRequestEvent, HttpResponseEvent
+from .modules.mqtt import MqttMessageEvent, MqttModule
 from .modules.network import NetworkModule
 from .modules.wifi import WifiModule
 from .types import NetworkInterface, WifiNetwork
 
 CLOUDCUTTER_FLASH = WifiNetwork(ssid="cloudcutterflash", password=b"abcdabcd")
+# events that start cores on real interfaces - never replayed
+COMMANDS = (
+    CoreTuyaServerStartCommand,
+    CoreTuyaApCfgConnectCommand,
+    CoreTuyaApCfgExploitCommand,
+)
 
 
 class Cloudcutter(ModuleBase):
+    # logs every event - don't let it grow without limit during bursts,
+    # nor hold up the modules broadcasting them if logging falls behind
+    queue_size = 1000
+    queue_overflow = Overflow.DROP_OLDEST
+
     network: NetworkModule
     wifi: WifiModule
     dhcp: DhcpModule
@@ -28,34 +50,79 @@ class Cloudcutter(ModuleBase):
     tuya_server: ModuleBase | None = None
     tuya_ap_cfg: ModuleBase | None = None
 
-    def __init__(self):
+    def __init__(self, headless: bool = False):
         super().__init__()
+        # don't touch any network interfaces (i.e. for replaying a journal)
+        self.headless = headless
         self.network = NetworkModule()
         self.wifi = WifiModule()
         self.dhcp = DhcpModule()
         self.dns = DnsModule()
         self.http = HttpModule()
         self.mqtt = MqttModule()
+        # per-class verbosity of on_event()
+        self.event_log = EventLogger(self, default=EventLogRule(max_repr=200))
+        high_rate = EventLogRule(level=DEBUG, rate=20, max_repr=100)
+        self.event_log.set_rule(HttpRequestEvent, high_rate)
+        self.event_log.set_rule(HttpResponseEvent, high_rate)
+        self.event_log.set_rule(DnsQueryEvent, high_rate)
+        self.event_log.set_rule(MqttMessageEvent, high_rate)
 
     async def run(self) -> None:
-        await self.network.start()
-        await self.wifi.start()
+        if not self.headless:
+            await self.network.start()
+            await self.wifi.start()
         await super().run()
 
     async def cleanup(self) -> None:
         await super().cleanup()
-        await self.wifi.stop()
-        await self.network.stop()
+        self.event_log.summary()
+        if not self.headless:
+            await self.wifi.stop()
+            await self.network.stop()
+
+    async def replay(self, path: Path, speed: float = None) -> None:
+        await self.start()
+        stats = await replay_journal(path, speed, skip=COMMANDS)
+        await self.wait_idle()
+        self.info(
+            f"Replayed {stats.events} events in {stats.duration:.3f} s "
+            f"({stats.events / (stats.duration or 1):.0f} events/s), "
+            f"skipped {stats.skipped} commands"
+        )
+        started = self.started_modules()
+        await self.stop()
+        if started:
+            names = ", ".join(type(module).__name__ for module in started)
+            raise RuntimeError(f"Replay started real modules: {names}")
+
+    def started_modules(self) -> list[ModuleBase]:
+        modules = [
+            self.network,
+            self.wifi,
+            self.dhcp,
+            self.dns,
+            self.http,
+            self.mqtt,
+            self.tuya_server,
+            self.tuya_ap_cfg,
+        ]
+        return [
+            module for module in modules if module and (module.thread or module.task)
+        ]
 
     @subscribe(BaseEvent)
     async def on_event(self, event) -> None:
-        self.info(f"EVENT: {event}")
+        self.event_log.log(event)
 
     @subscribe(CoreTuyaServerStartCommand)
     async def on_tuya_server_start_command(
         self,
         event: CoreTuyaServerStartCommand,
     ) -> None:
+        if self.headless:
+            self.info(f"Headless - ignoring {type(event).__name__}")
+            return
         from .cores.server import TuyaServer
 
         interface = await self.network.get_interface(NetworkInterface.Type.WIRELESS_AP)
@@ -71,6 +138,9 @@ class Cloudcutter(ModuleBase):
         self,
         event: CoreTuyaApCfgConnectCommand,
     ) -> None:
+        if self.headless:
+            self.info(f"Headless - ignoring {type(event).__name__}")
+            return
         if self.tuya_ap_cfg:
             await self.tuya_ap_cfg.stop()
             self.tuya_ap_cfg = None
@@ -91,6 +161,9 @@ class Cloudcutter(ModuleBase):
         self,
         event: CoreTuyaApCfgExploitCommand,
     ) -> None:
+        if self.headless:
+            self.info(f"Headless - ignoring {type(event).__name__}")
+            return
         if self.tuya_ap_cfg:
             await self.tuya_ap_cfg.stop()
             self.tuya_ap_cfg = None
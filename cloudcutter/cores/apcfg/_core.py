@@ -1,13 +1,13 @@
 #  Copyright (c) Kuba Szczodrzyński 2024-3-23.
 
-import asyncio
 import random
 import re
 import string
 from socket import AF_INET, SOCK_DGRAM, socket
 
 from cloudcutter.core import Cloudcutter
-from cloudcutter.modules.base import ModuleBase
+from cloudcutter.modules.base import SCHEDULER, Backoff, ModuleBase
+from cloudcutter.modules.wifi import WifiConnectedEvent, WifiDisconnectedEvent
 from cloudcutter.types import Ip4Config, NetworkInterface, WifiNetwork
 
 from ._events import (
@@ -132,36 +132,51 @@ class TuyaApCfg(ModuleBase):
         payload += b"}"
         return payload
 
-    async def run(self) -> None:
-        target_network: WifiNetwork | None = None
-        while not target_network:
-            TuyaApCfgSearchingEvent().broadcast()
-            networks = await self.core.wifi.scan_networks(self.interface)
-            for network in networks:
-                if self.target_network:
-                    if network.ssid != self.target_network.ssid:
-                        self.verbose(f"Skipping '{network.ssid}' - network specified")
-                        continue
-                else:
-                    if network.auth is not None:
-                        self.verbose(f"Skipping '{network.ssid}' - WPA encrypted")
-                        continue
-                    if re.match(r"^.+-[A-F0-9]{4}$", network.ssid) is None:
-                        self.verbose(f"Skipping '{network.ssid}' - doesn't match")
-                        continue
-                target_network = network
-                break
+    async def find_network(self) -> WifiNetwork | None:
+        TuyaApCfgSearchingEvent().broadcast()
+        networks = await self.core.wifi.scan_networks(self.interface)
+        for network in networks:
+            if self.target_network:
+                if network.ssid != self.target_network.ssid:
+                    self.verbose(f"Skipping '{network.ssid}' - network specified")
+                    continue
             else:
-                self.debug(f"Found {len(networks)} networks, but no SmartLife AP")
-                await asyncio.sleep(2)
+                if network.auth is not None:
+                    self.verbose(f"Skipping '{network.ssid}' - WPA encrypted")
+                    continue
+                if re.match(r"^.+-[A-F0-9]{4}$", network.ssid) is None:
+                    self.verbose(f"Skipping '{network.ssid}' - doesn't match")
+                    continue
+            return network
+        self.debug(f"Found {len(networks)} networks, but no SmartLife AP")
+        return None
+
+    async def get_ipconfig(self) -> Ip4Config | None:
+        ipconfig_list = await self.core.network.get_ip4config(self.interface)
+        if not ipconfig_list:
+            return None
+        ipconfig_single = ipconfig_list[0]
+        if ipconfig_single.address.is_link_local:
+            return None
+        return ipconfig_single
+
+    async def get_station_state(self) -> WifiNetwork | None:
+        return await self.core.wifi.get_station_state(self.interface)
 
+    async def run(self) -> None:
+        target_network = await SCHEDULER.wait_until(
+            self.find_network,
+            backoff=Backoff(initial=2),
+        )
         TuyaApCfgFoundEvent(target_network).broadcast()
 
+        async def is_disconnected() -> bool:
+            return not await self.get_station_state()
+
         self.debug("Disconnecting from network")
         await self.core.wifi.stop_station(self.interface)
-        while await self.core.wifi.get_station_state(self.interface):
-            self.debug("Waiting for disconnection...")
-            await asyncio.sleep(1)
+        self.debug("Waiting for disconnection...")
+        await SCHEDULER.wait_until(is_disconnected, wake=[WifiDisconnectedEvent])
 
         self.debug("Clearing IP config")
         await self.core.network.get_ip4config(self.interface)
@@ -172,30 +187,27 @@ class TuyaApCfg(ModuleBase):
             network=target_network,
         )
 
-        while not (station := await self.core.wifi.get_station_state(self.interface)):
-            self.debug("Waiting for connection...")
-            await asyncio.sleep(1)
+        self.debug("Waiting for connection...")
+        station = await SCHEDULER.wait_until(
+            self.get_station_state,
+            wake=[WifiConnectedEvent],
+        )
         self.debug(f"Connected to '{station.ssid}'")
 
-        async def get_ipconfig() -> Ip4Config | None:
-            ipconfig_list = await self.core.network.get_ip4config(self.interface)
-            if not ipconfig_list:
-                return None
-            ipconfig_single = ipconfig_list[0]
-            if ipconfig_single.address.is_link_local:
-                return None
-            return ipconfig_single
-
-        while not (ipconfig := await get_ipconfig()):
-            self.debug("Waiting for IP address...")
-            await asyncio.sleep(1)
+        self.debug("Waiting for IP address...")
+        ipconfig = await SCHEDULER.wait_until(self.get_ipconfig)
         self.debug(f"Got IP address '{ipconfig}'")
         TuyaApCfgConnectedEvent(station, ipconfig).broadcast()
 
-        while not (ping_rtt := await self.core.network.ping(ipconfig.first)):
-            ipconfig = await get_ipconfig()
-            self.debug("Waiting for ping...")
-            await asyncio.sleep(1)
+        async def ping() -> float | None:
+            nonlocal ipconfig
+            if ping_rtt := await self.core.network.ping(ipconfig.first):
+                return ping_rtt
+            ipconfig = await self.get_ipconfig()
+            return None
+
+        self.debug("Waiting for ping...")
+        ping_rtt = await SCHEDULER.wait_until(ping)
         TuyaApCfgReadyEvent(target_network, ipconfig.first, ping_rtt).broadcast()
 
         frame = ApCfgFrame(payload=self.encode_payload())
@@ -208,7 +220,7 @@ class TuyaApCfg(ModuleBase):
             assert len(datagram) == 256
 
         while await self.core.network.ping(ipconfig.first):
-            ipconfig = await get_ipconfig()
+            ipconfig = await self.get_ipconfig()
             sock = socket(AF_INET, SOCK_DGRAM)
             target_address = ipconfig.first
             target_port = 6669
@@ -217,13 +229,13 @@ class TuyaApCfg(ModuleBase):
                     f"Sending ApCfg datagram #{i + 1} to {target_address}:{target_port}"
                 )
                 sock.sendto(datagram, (str(target_address), target_port))
-                await asyncio.sleep(0.200)
+                await SCHEDULER.sleep(0.200)
             TuyaApCfgSentEvent(target_network, target_address, target_port).broadcast()
 
+        async def is_target_left() -> bool:
+            station = await self.get_station_state()
+            return not station or station.ssid != target_network.ssid
+
         self.debug("Device no longer responds, waiting for Wi-Fi disconnection")
-        while (
-            station := await self.core.wifi.get_station_state(self.interface)
-        ) and station.ssid == target_network.ssid:
-            self.debug("Waiting for disconnection...")
-            await asyncio.sleep(1)
+        await SCHEDULER.wait_until(is_target_left, wake=[WifiDisconnectedEvent])
         TuyaApCfgFinishedEvent(target_network).broadcast()
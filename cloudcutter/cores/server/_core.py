@@ -1,12 +1,11 @@
 #  Copyright (c) Kuba Szczodrzyński 2024-3-22.
 
-import asyncio
 import ssl
 from ipaddress import IPv4Address
 from pathlib import Path
 
 from cloudcutter.core import Cloudcutter
-from cloudcutter.modules.base import ModuleBase
+from cloudcutter.modules.base import ModuleBase, StartupGraph
 from cloudcutter.types import Ip4Config, NetworkInterface, WifiNetwork
 
 from ._data import TuyaServerData
@@ -67,23 +66,11 @@ class TuyaServer(
         )
         self.upgraded_devices = set()
 
-        await self.core.wifi.start_access_point(
-            interface=self.interface,
-            network=self.network,
-        )
-
-        if self.ipconfig not in (await self.core.network.get_ip4config(self.interface)):
-            await self.core.network.set_ip4config(
-                interface=self.interface,
-                ipconfig=self.ipconfig,
-            )
-
         self.core.dhcp.configure(
             ipconfig=self.ipconfig,
             ip_range=(ip_dhcp_start, ip_dhcp_end),
             dns=self.ipconfig.address,
         )
-        await self.core.dhcp.start()
 
         self.core.dns.add_record("h2.iot-dns.com", "A", self.ipconfig.address)
         self.core.dns.add_record("h3.iot-dns.com", "A", self.ipconfig.address)
@@ -98,7 +85,6 @@ class TuyaServer(
                     type="A",
                     answer=self.ipconfig.address,
                 )
-        await self.core.dns.start()
 
         self.core.http.configure(
             address=self.ipconfig.address,
@@ -111,16 +97,44 @@ class TuyaServer(
         self.core.http.add_ssl_psk(self.calc_psk_v1, identity=b"\x01.+")
         self.core.http.add_ssl_psk(self.calc_psk_v2, identity=b"\x02.+")
         self.core.http.add_handlers(self)
-        await self.core.http.start()
 
         self.core.mqtt.configure(
             address=self.ipconfig.address,
         )
         await self.core.mqtt.add_handlers(self)
-        await self.core.mqtt.start()
 
-        while True:
-            await asyncio.sleep(10)
+        # start independent modules concurrently
+        startup = StartupGraph()
+        startup.add(
+            "access_point",
+            self.start_access_point,
+            stop=self.stop_access_point,
+        )
+        startup.add("ipconfig", self.set_ipconfig, requires=["access_point"])
+        startup.add_module(self.core.dhcp)
+        startup.add_module(self.core.dns)
+        startup.add_module(self.core.http)
+        startup.add_module(self.core.mqtt)
+        await startup.run()
+
+        # serve module calls until stopped, instead of polling
+        await self.event_loop()
+
+    async def start_access_point(self) -> None:
+        await self.core.wifi.start_access_point(
+            interface=self.interface,
+            network=self.network,
+        )
+
+    async def stop_access_point(self) -> None:
+        await self.core.wifi.stop_access_point(self.interface)
+
+    async def set_ipconfig(self) -> None:
+        if self.ipconfig not in (await self.core.network.get_ip4config(self.interface)):
+            await self.core.network.set_ip4config(
+                interface=self.interface,
+                ipconfig=self.ipconfig,
+            )
 
     async def cleanup(self) -> None:
         await super().cleanup()
@@ -130,7 +144,7 @@ class TuyaServer(
         self.core.http.clear_ssl_psk()
         self.core.http.clear_ssl_certs()
         self.core.dns.clear_records()
-        await self.core.wifi.stop_access_point(self.interface)
+        await self.stop_access_point()
 
         await self.core.mqtt.stop()
         await self.core.http.stop()
@@ -5,7 +5,7 @@ from enum import IntEnum
 from ipaddress import IPv4Address
 from pathlib import Path
 
-from cloudcutter.modules.base import BaseEvent
+from cloudcutter.modules.base import BaseEvent, Coalesce, Overflow
 
 from ._types import Device
 
@@ -17,12 +17,16 @@ class TuyaUrlConfigEvent(BaseEvent):
 
 @dataclass
 class TuyaDeviceActiveEvent(BaseEvent):
+    __ordering__ = "device.uuid"
+
     device: Device
     data: dict
 
 
 @dataclass
 class TuyaDeviceRequestEvent(BaseEvent):
+    __ordering__ = "device.uuid"
+
     device: Device
     action: str
     data: dict
@@ -30,18 +34,24 @@ class TuyaDeviceRequestEvent(BaseEvent):
 
 @dataclass
 class TuyaDeviceLogEvent(BaseEvent):
+    __ordering__ = "device.uuid"
+
     device: Device
     message: str
 
 
 @dataclass
 class TuyaDeviceDataEvent(BaseEvent):
+    __ordering__ = "device.uuid"
+
     device: Device
     data: dict
 
 
 @dataclass
 class TuyaUpgradeSkipEvent(BaseEvent):
+    __ordering__ = "device.uuid"
+
     device: Device
     reason: "Reason"
 
@@ -52,12 +62,16 @@ class TuyaUpgradeSkipEvent(BaseEvent):
 
 @dataclass
 class TuyaUpgradeTriggerEvent(BaseEvent):
+    __ordering__ = "device.uuid"
+
     device: Device
     action: str
 
 
 @dataclass
 class TuyaUpgradeInfoEvent(BaseEvent):
+    __ordering__ = "device.uuid"
+
     device: Device
     action: str
     firmware_path: Path
@@ -66,17 +80,25 @@ class TuyaUpgradeInfoEvent(BaseEvent):
 
 @dataclass
 class TuyaUpgradeStatusEvent(BaseEvent):
+    __ordering__ = "device.uuid"
+
     device: Device
     status: int
 
 
 @dataclass
 class TuyaUpgradeProgressEvent(BaseEvent):
+    __policy__ = Coalesce(window=0.5, key=lambda e: e.device.uuid)
+    __overflow__ = Overflow.COALESCE
+    __ordering__ = "device.uuid"
+
     device: Device
     progress: int
 
 
 @dataclass
 class TuyaUpgradeDownloadEvent(BaseEvent):
+    __ordering__ = "device.uuid"
+
     device: Device
     firmware_path: Path
@@ -20,12 +20,13 @@ from .device import DeviceCore
 
 
 class GatewayCore(DeviceCore, TuyaServerData, ModuleBase):
-    def _decrypt_http(
+    async def _decrypt_http(
         self,
         request: Request,
     ) -> tuple[Device, dict]:
         device = self.get_device(request=request)
-        data = bytes.fromhex(request.body["data"])
+        body = await request.body.decode()
+        data = bytes.fromhex(body["data"])
 
         match device.encryption_type:
             case 0:
@@ -90,7 +91,7 @@ class GatewayCore(DeviceCore, TuyaServerData, ModuleBase):
 
     @httpm.post("/d.json", query=dict(a="tuya.device.active"))
     async def on_gateway_active(self, request: Request) -> Response:
-        device, data = self._decrypt_http(request)
+        device, data = await self._decrypt_http(request)
         self.debug(f"Activating device: uuid={device.uuid}, softVer={data['softVer']}")
         schema = [
             {
@@ -123,7 +124,7 @@ class GatewayCore(DeviceCore, TuyaServerData, ModuleBase):
     async def on_gateway_other(self, request: Request) -> Response:
         action = request.query.get("a", None)
         self.debug(f"Gateway request: {action}")
-        device, data = self._decrypt_http(request)
+        device, data = await self._decrypt_http(request)
         result = None
         schema_path = self.schema_path / f"{action}.json"
         if schema_path.is_file():
@@ -25,7 +25,7 @@ class OtaCore(GatewayCore, MqttCore, TuyaServerData, ModuleBase):
     @httpm.post("/d.json", query=dict(a="tuya.device.dynamic.config.ack"))
     @httpm.post("/d.json", query=dict(a="tuya.device.timer.count"))
     async def on_upgrade_trigger(self, request: Request) -> Response:
-        device, data = self._decrypt_http(request)
+        device, data = await self._decrypt_http(request)
 
         if device.uuid in self.upgraded_devices:
             TuyaUpgradeSkipEvent(
@@ -60,7 +60,7 @@ class OtaCore(GatewayCore, MqttCore, TuyaServerData, ModuleBase):
 
     @httpm.post("/d.json", query=dict(a="tuya.device.upgrade.silent.get"))
     async def on_upgrade_silent_get(self, request: Request) -> Response:
-        device, data = self._decrypt_http(request)
+        device, data = await self._decrypt_http(request)
 
         if device.uuid in self.upgraded_devices:
             TuyaUpgradeSkipEvent(
@@ -79,7 +79,7 @@ class OtaCore(GatewayCore, MqttCore, TuyaServerData, ModuleBase):
 
     @httpm.post("/d.json", query=dict(a="tuya.device.upgrade.get"))
     async def on_upgrade_get(self, request: Request) -> Response:
-        device, data = self._decrypt_http(request)
+        device, data = await self._decrypt_http(request)
 
         if not device.firmware_path:
             TuyaUpgradeSkipEvent(
@@ -118,7 +118,7 @@ class OtaCore(GatewayCore, MqttCore, TuyaServerData, ModuleBase):
 
     @httpm.post("/d.json", query=dict(a="tuya.device.upgrade.status.update"))
     async def on_upgrade_status(self, request: Request) -> Response:
-        device, data = self._decrypt_http(request)
+        device, data = await self._decrypt_http(request)
 
         TuyaUpgradeStatusEvent(device, status=data["upgradeStatus"]).broadcast()
 
@@ -2,11 +2,38 @@
 
 from .base import ModuleBase
 from .event import module_thread, subscribe
-from .model import BaseEvent
+from .eventlog import EventLogger, EventLogRule
+from .index import EventBatch
+from .journal import EventJournal, read_journal, replay_journal
+from .logger import LOG_QUEUE
+from .model import BaseEvent, wait_any
+from .policy import Batch, Coalesce
+from .process import PROCESSES, CommandResult
+from .queue import Overflow
+from .runtime import RUNTIME
+from .scheduler import SCHEDULER, Backoff
+from .startup import StartupGraph
 
 __all__ = [
     "ModuleBase",
     "BaseEvent",
     "subscribe",
+    "wait_any",
     "module_thread",
+    "Batch",
+    "Coalesce",
+    "Overflow",
+    "RUNTIME",
+    "SCHEDULER",
+    "PROCESSES",
+    "CommandResult",
+    "Backoff",
+    "LOG_QUEUE",
+    "StartupGraph",
+    "EventBatch",
+    "EventJournal",
+    "EventLogger",
+    "EventLogRule",
+    "read_journal",
+    "replay_journal",
 ]
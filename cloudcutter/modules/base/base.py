@@ -2,9 +2,12 @@
 
 import os
 import sys
-from subprocess import PIPE, Popen
+from typing import Any, Callable, Sequence
 
 from .event import EventMixin
+from .process import DEFAULT, PROCESSES, CommandResult, Default, OutputCallback
+from .runtime import RUNTIME
+from .utils import T
 
 
 class ModuleBase(EventMixin):
@@ -16,12 +19,28 @@ class ModuleBase(EventMixin):
     def is_linux() -> bool:
         return sys.platform == "linux"
 
-    def command(self, *args: str) -> bytes:
-        p = Popen(args=[*args], stdout=PIPE, stderr=PIPE)
-        stdout, stderr = p.communicate()
-        if p.wait() != 0:
-            raise RuntimeError(
-                f"Command {args} failed ({p.returncode}): {(stdout or stderr)}"
-            )
-        self.debug(f"Command {args} finished")
-        return stdout
+    async def command(
+        self,
+        *args: str,
+        timeout: float | None | Default = DEFAULT,
+        on_output: OutputCallback = None,
+    ) -> bytes:
+        result = await PROCESSES.run(*args, timeout=timeout, on_output=on_output)
+        self.debug(f"Command {args} finished in {result.elapsed * 1000:.1f} ms")
+        return result.stdout
+
+    async def command_batch(
+        self,
+        *commands: Sequence[str],
+        timeout: float | None | Default = DEFAULT,
+    ) -> list[CommandResult]:
+        results = await PROCESSES.run_batch(*commands, timeout=timeout)
+        self.debug(f"Command batch of {len(results)} finished")
+        return results
+
+    @staticmethod
+    async def run_blocking(func: Callable[..., T], *args: Any) -> T:
+        if not RUNTIME.reactor:
+            # the module has a thread of its own
+            return func(*args)
+        return await RUNTIME.run_blocking(func, *args)
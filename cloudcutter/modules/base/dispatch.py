@@ -0,0 +1,67 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+import asyncio
+from asyncio import Semaphore, Task
+from functools import partial
+from typing import Any, Coroutine, Hashable
+
+
+class OrderedDispatcher:
+    # runs coroutines concurrently (up to a limit), keeping the order
+    # of coroutines submitted with the same key (unless it's None)
+
+    def __init__(self, limit: int, backlog: int = None):
+        # backlog - submitted coroutines (running or waiting) before
+        # submit() starts to wait
+        self.limit = limit
+        self._slots = Semaphore(limit)
+        self._backlog = Semaphore(backlog or limit * 4)
+        # key -> last submitted task with that key
+        self._lanes: dict[Hashable, Task] = {}
+        self._tasks: set[Task] = set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    async def submit(self, key: Hashable, coro: Coroutine[Any, Any, Any]) -> None:
+        # waits if the backlog is full, so that producers can't outrun
+        # the handlers
+        try:
+            await self._backlog.acquire()
+        except asyncio.CancelledError:
+            coro.close()
+            raise
+        previous = self._lanes.get(key) if key is not None else None
+        task = asyncio.create_task(self._run(previous, coro))
+        if key is not None:
+            self._lanes[key] = task
+        self._tasks.add(task)
+        task.add_done_callback(partial(self._done, key))
+
+    async def _run(self, previous: Task | None, coro: Coroutine) -> None:
+        try:
+            if previous:
+                # don't care how it ended, only that it did
+                await asyncio.wait([previous])
+            # take a slot only when it's this one's turn - lanes waiting
+            # for their predecessors mustn't hold slots the predecessors need
+            async with self._slots:
+                await coro
+        finally:
+            # no-op if it ran - otherwise it was cancelled before starting
+            coro.close()
+            self._backlog.release()
+
+    def _done(self, key: Hashable, task: Task) -> None:
+        self._tasks.discard(task)
+        if self._lanes.get(key) is task:
+            self._lanes.pop(key)
+
+    async def join(self) -> None:
+        while self._tasks:
+            await asyncio.wait(list(self._tasks))
+
+    def cancel(self) -> None:
+        for task in self._tasks:
+            task.cancel()
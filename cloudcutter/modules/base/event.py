@@ -1,53 +1,91 @@
 #  Copyright (c) Kuba Szczodrzyński 2023-9-8.
 
 import asyncio
-from asyncio import AbstractEventLoop, Future
-from queue import Queue
+from asyncio import Future, Task
 from threading import Thread, current_thread
-from typing import Any, Awaitable, Generator
+from typing import Any, Awaitable, Callable, Generator, Hashable
 
+from .dispatch import OrderedDispatcher
 from .future import FutureMixin
+from .index import SUBSCRIBERS, EventBatch, Subscription, event_key
 from .logger import LoggerMixin
 from .model import BaseEvent, CoroutineCallEvent, MethodCallEvent
-from .utils import EventHandler, T, make_attr_dict
+from .queue import EventQueue, Overflow
+from .runtime import RUNTIME
+from .utils import CURRENT_MODULE, EventHandler, T
+
+# dispatcher lane of events without __ordering__ - never an ordering key,
+# which are (attribute, value) or (attribute,)
+UNORDERED: Hashable = ()
 
 
 class EventMixin(FutureMixin, LoggerMixin):
-    queue: Queue[MethodCallEvent | CoroutineCallEvent | BaseEvent | Future]
+    queue: EventQueue[MethodCallEvent | CoroutineCallEvent | BaseEvent | EventBatch]
     thread: Thread | None = None
+    task: Task | None = None
     should_run: bool = False
-    in_event_queue: bool = False
+    # maximum number of queued events (0 - unlimited)
+    queue_size: int = 0
+    # used instead of BLOCK when the queue is full (None - block the producer);
+    # events that set another __overflow__ keep it
+    queue_overflow: Overflow | None = None
+    # maximum number of event handlers running at once (1 - strictly serial)
+    dispatch_limit: int = 16
+    dispatcher: OrderedDispatcher | None = None
+    # StartupGraph steps that have to be done before starting
+    requires: tuple[str, ...] = ()
+    _event_task: Task | None = None
+    _in_run: bool = False
 
     def __init__(self):
         super().__init__()
-        self.queue = Queue()
+        self.queue = EventQueue(self.queue_size, self.queue_overflow)
 
     def entrypoint(self, future: Future = None) -> None:
-        self.should_run = True
         thread = current_thread()
         thread.name = thread.name.replace("(entrypoint)", "").strip()
+        loop = asyncio.new_event_loop()
         try:
-            loop = asyncio.get_running_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
+            loop.run_until_complete(self.main(future))
+        finally:
+            loop.close()
+
+    async def main(self, future: Future = None) -> None:
+        self.should_run = True
+        CURRENT_MODULE.set(self)
+        self.dispatcher = OrderedDispatcher(self.dispatch_limit)
         if future:
-            self.resolve_future(future)  # notify that the thread is running
+            self.resolve_future(future)  # notify that the module is running
         try:
-            loop.run_until_complete(self.run())
+            self._in_run = True
+            await self.run()
+        except asyncio.CancelledError:
+            if self.should_run:
+                raise
         except Exception as e:
             if self.should_run:
-                self.exception("Thread raised exception", exc_info=e)
+                self.exception("Module raised exception", exc_info=e)
+        finally:
+            self._in_run = False
 
         self.verbose("Finished run()")
+        if self.queue.dropped or self.queue.blocked or self.queue.coalesced:
+            self.debug(f"Event queue stats: {self.queue.stats()}")
         self.thread = None  # clear thread created in start()
-        loop.run_until_complete(self.cleanup())
-        if self.in_event_queue:
-            # stop the event loop if in another thread
-            loop.run_until_complete(self.event_loop_thread_stop())
+        self.task = None
+        await self.cleanup()
+        # stop the event loop if running alongside run()
+        await self.event_loop_stop()
 
     async def start(self) -> None:
         self.verbose(f"Starting")
+        self.queue.open()
         future = self.make_future()
+        if RUNTIME.reactor:
+            # run as a task on the shared loop
+            self.task = asyncio.create_task(self.main(future))
+            await future
+            return
         self.thread = Thread(
             target=self.entrypoint,
             args=[future],
@@ -59,7 +97,13 @@ class EventMixin(FutureMixin, LoggerMixin):
     async def stop(self) -> None:
         self.verbose(f"Stopping (request)")
         self.should_run = False
-        await self.event_loop_thread_stop()
+        # unblock the message loop
+        self.queue.close()
+        if self.task and self.task is not asyncio.current_task():
+            if self._in_run:
+                # interrupt run(), but let cleanup() finish
+                self.task.cancel()
+            await asyncio.wait([self.task])
         if self.thread and self.thread is not current_thread():
             self.thread.join()
 
@@ -71,78 +115,114 @@ class EventMixin(FutureMixin, LoggerMixin):
     async def cleanup(self) -> None:
         self.unregister_subscribers()
 
-    async def event_loop(self, loop: AbstractEventLoop = None) -> None:
-        while self.should_run:
-            self.in_event_queue = True
-            event = self.queue.get()
-            self.in_event_queue = False
-            match event:
-                case Future():
-                    self.resolve_future(event)
-                    break
-                case MethodCallEvent(future, func, args, kwargs):
-                    result = await func(self, *args, **kwargs)
-                    self.resolve_future(future, result)
-                case CoroutineCallEvent(coro):
-                    await coro
-                case BaseEvent():
-                    for func, obj in self._iter_event_handlers():
-                        # dispatch to instance methods
-                        # if event type or entire value matches
-                        type_matches = isinstance(obj, type) and isinstance(event, obj)
-                        value_matches = event == obj
-                        if type_matches or value_matches:
-                            if loop:
-                                asyncio.run_coroutine_threadsafe(
-                                    func(self, event),
-                                    loop,
-                                )
-                            else:
-                                await func(self, event)
-
-    async def event_loop_thread_start(self) -> None:
-        loop = asyncio.get_running_loop()
-        future = self.make_future()
+    async def event_loop(self) -> None:
+        try:
+            while self.should_run:
+                event = await self.queue.get()
+                match event:
+                    case None:
+                        # queue closed
+                        break
+                    case MethodCallEvent(future, func, args, kwargs):
+                        # not ahead of events queued before the call
+                        await self.dispatcher.join()
+                        result = await func(self, *args, **kwargs)
+                        self.resolve_future(future, result)
+                    case CoroutineCallEvent(coro):
+                        await self.dispatcher.join()
+                        await coro
+                    case BaseEvent():
+                        await self._dispatch([event])
+                    case EventBatch(events):
+                        await self._dispatch(events)
+        except asyncio.CancelledError:
+            self.dispatcher.cancel()
+            raise
+        finally:
+            # let running handlers finish
+            await self.dispatcher.join()
 
-        def event_loop():
-            self.resolve_future(future)
-            worker_loop = asyncio.new_event_loop()
-            worker_loop.run_until_complete(self.event_loop(loop))
+    async def _dispatch(self, events: list[BaseEvent]) -> None:
+        if self.dispatch_limit <= 1:
+            await self._dispatch_events(events)
+            return
+        # split into groups that must keep their order
+        ordering = type(events[0]).__ordering__
+        if not ordering:
+            # no key to tell them apart - handled in order with each other,
+            # only concurrently with ordered lanes
+            await self.dispatcher.submit(UNORDERED, self._dispatch_safe(events))
+            return
+        lanes: dict[Hashable, list[BaseEvent]] = {}
+        for event in events:
+            # never None, which would mean no ordering
+            key = (ordering, event_key(event, ordering))
+            try:
+                lanes.setdefault(key, []).append(event)
+            except TypeError:
+                # can't tell them apart - keep them in order with each other
+                lanes.setdefault((ordering,), []).append(event)
+        for key, lane in lanes.items():
+            await self.dispatcher.submit(key, self._dispatch_safe(lane))
 
-        Thread(target=event_loop).start()
-        await future
+    async def _dispatch_safe(self, events: list[BaseEvent]) -> None:
+        try:
+            await self._dispatch_events(events)
+        except Exception as e:
+            self.exception("Event handler raised exception", exc_info=e)
 
-    async def event_loop_thread_stop(self) -> None:
-        if self.in_event_queue:
-            # unblock the message loop
-            future = self.make_future()
-            self.queue.put(future)
-            await future
+    async def _dispatch_events(self, events: list[BaseEvent]) -> None:
+        # dispatch to instance methods
+        # if event type (and key/predicate) or entire value matches
+        for sub in SUBSCRIBERS.handlers(self, type(events[0])):
+            matched = events
+            if sub.filtered:
+                matched = [event for event in events if sub.accepts(event)]
+            if sub.batch and matched:
+                await sub.func(self, matched)
+                continue
+            for event in matched:
+                await sub.func(self, event)
 
-    def _iter_event_handlers(self) -> Generator[tuple[Any, type | object], Any, None]:
+    async def event_loop_start(self) -> None:
+        # run the event loop as a task, sharing the module's asyncio loop
+        if self._event_task and not self._event_task.done():
+            return
+        self._event_task = asyncio.create_task(self.event_loop())
+
+    async def event_loop_stop(self) -> None:
+        self.queue.close()
+        task, self._event_task = self._event_task, None
+        if task and task is not asyncio.current_task():
+            await task
+
+    def _iter_event_handlers(self) -> Generator[Subscription, Any, None]:
         for name, func in type(self).__dict__.items():
-            if not hasattr(func, "__events__"):
-                continue
-            for obj in getattr(func, "__events__"):
-                yield func, obj
+            yield from getattr(func, "__events__", [])
 
     def register_subscribers(self) -> None:
-        for _, obj in self._iter_event_handlers():
-            cls = obj if isinstance(obj, type) else obj.__class__
-            make_attr_dict(cls, "__subscribers__")[self] = obj
+        SUBSCRIBERS.register(self, self._iter_event_handlers())
 
     def unregister_subscribers(self) -> None:
-        for _, obj in self._iter_event_handlers():
-            cls = obj if isinstance(obj, type) else obj.__class__
-            try:
-                make_attr_dict(cls, "__subscribers__").pop(self, None)
-            except KeyError:
-                pass
+        SUBSCRIBERS.unregister(self)
 
     def call_coroutine(self, coro: Awaitable[Any]) -> None:
         self.queue.put(CoroutineCallEvent(coro))
 
+    async def wait_idle(self) -> None:
+        # wait until everything queued so far has been handled
+        future = self.make_future()
+
+        async def resolve():
+            await self.dispatcher.join()
+            self.resolve_future(future)
+
+        self.call_coroutine(resolve())
+        await future
+
     async def call_threaded(self, coro: Awaitable[Any]) -> Future[bool]:
+        if RUNTIME.reactor:
+            return asyncio.ensure_future(coro)
         start_future = self.make_future()
         end_future = self.make_future()
 
@@ -157,11 +237,20 @@ class EventMixin(FutureMixin, LoggerMixin):
         return end_future
 
 
-def subscribe(obj: type | object):
+def subscribe(
+    obj: type | object,
+    *,
+    batch: bool = False,
+    key: str = None,
+    value: Hashable = None,
+    predicate: Callable[[Any], bool] = None,
+):
     def decorator(func: EventHandler) -> EventHandler:
         if not hasattr(func, "__events__"):
-            setattr(func, "__events__", set())
-        getattr(func, "__events__").add(obj)
+            setattr(func, "__events__", [])
+        sub = Subscription(func, obj, batch, key, value, predicate)
+        if sub not in getattr(func, "__events__"):
+            getattr(func, "__events__").append(sub)
         return func
 
     return decorator
@@ -0,0 +1,126 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+from dataclasses import dataclass, fields
+from logging import INFO
+from reprlib import Repr
+from time import monotonic
+from typing import Any
+
+from .logger import ROOT, LoggerMixin
+
+
+@dataclass
+class EventLogRule:
+    # logging level (None - don't log at all)
+    level: int | None = INFO
+    # log only every N-th event
+    sample: int = 1
+    # log at most this many events per second (0 - no limit)
+    rate: float = 0
+    # maximum length of each field's repr (0 - no limit)
+    max_repr: int = 0
+
+
+_REPRS: dict[int, Repr] = {}
+
+
+class _EventRepr:
+    # formatted only if (and when) the log record is emitted
+    __slots__ = ("event", "repr")
+
+    def __init__(self, event: Any, max_repr: int):
+        self.event = event
+        self.repr = None
+        if max_repr:
+            self.repr = _REPRS.get(max_repr)
+            if self.repr is None:
+                self.repr = _REPRS[max_repr] = Repr()
+                self.repr.maxstring = self.repr.maxother = max_repr
+
+    def __str__(self) -> str:
+        if not self.repr:
+            return repr(self.event)
+        values = ", ".join(
+            f"{f.name}={self.repr.repr(getattr(self.event, f.name))}"
+            for f in fields(self.event)
+            if f.repr
+        )
+        return f"{type(self.event).__name__}({values})"
+
+
+class _EventCounter:
+    def __init__(self):
+        self.seen = 0
+        self.suppressed = 0
+        self.window = 0.0
+        self.logged = 0
+
+
+class EventLogger:
+    def __init__(self, logger: LoggerMixin, default: EventLogRule = None):
+        self.logger = logger
+        self.default = default or EventLogRule()
+        # event class (or base class) -> its rule
+        self.rules: dict[type, EventLogRule] = {}
+        self._rules: dict[type, EventLogRule] = {}
+        self._counters: dict[type, _EventCounter] = {}
+
+    def set_rule(self, cls: type, rule: EventLogRule) -> None:
+        self.rules[cls] = rule
+        self._rules = {}
+
+    def rule(self, cls: type) -> EventLogRule:
+        try:
+            return self._rules[cls]
+        except KeyError:
+            pass
+        rule = next(
+            (self.rules[base] for base in cls.__mro__ if base in self.rules),
+            self.default,
+        )
+        self._rules[cls] = rule
+        return rule
+
+    def log(self, event: Any) -> None:
+        cls = type(event)
+        rule = self.rule(cls)
+        if rule.level is None or not ROOT.isEnabledFor(rule.level):
+            return
+        counter = self._counters.get(cls)
+        if counter is None:
+            counter = self._counters[cls] = _EventCounter()
+        counter.seen += 1
+        if rule.sample > 1 and counter.seen % rule.sample != 1:
+            counter.suppressed += 1
+            return
+        if rule.rate:
+            now = monotonic()
+            if now - counter.window >= 1.0:
+                counter.window = now
+                counter.logged = 0
+            if counter.logged >= rule.rate:
+                counter.suppressed += 1
+                return
+            counter.logged += 1
+        suppressed, counter.suppressed = counter.suppressed, 0
+        if suppressed:
+            self.logger.log(
+                rule.level,
+                "EVENT: %s (%d more suppressed)",
+                _EventRepr(event, rule.max_repr),
+                suppressed,
+            )
+        else:
+            self.logger.log(rule.level, "EVENT: %s", _EventRepr(event, rule.max_repr))
+
+    def summary(self) -> None:
+        # report events suppressed since the last logged one
+        for cls, counter in self._counters.items():
+            if counter.suppressed:
+                self.logger.log(
+                    self.rule(cls).level,
+                    "EVENT: %d %s suppressed",
+                    counter.suppressed,
+                    cls.__name__,
+                )
+                counter.suppressed = 0
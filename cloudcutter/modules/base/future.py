@@ -1,10 +1,27 @@
 #  Copyright (c) Kuba Szczodrzyński 2023-9-8.
 
 import asyncio
-from asyncio import Future
+from asyncio import AbstractEventLoop, Future
 from typing import Any
 
 
+def _on_loop(loop: AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+def _set_result(future: Future, result: Any) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: Future, error: Any) -> None:
+    if not future.done():
+        future.set_exception(error)
+
+
 class FutureMixin:
     @staticmethod
     def make_future() -> Future[bool]:
@@ -12,14 +29,16 @@ class FutureMixin:
 
     @staticmethod
     def resolve_future(future: Future, result: Any = None) -> None:
-        async def resolve():
-            future.set_result(result)
-
-        asyncio.run_coroutine_threadsafe(resolve(), future.get_loop())
+        loop = future.get_loop()
+        if _on_loop(loop):
+            _set_result(future, result)
+        else:
+            loop.call_soon_threadsafe(_set_result, future, result)
 
     @staticmethod
     def reject_future(future: Future, error: Any = None) -> None:
-        async def resolve():
-            future.set_exception(error)
-
-        asyncio.run_coroutine_threadsafe(resolve(), future.get_loop())
+        loop = future.get_loop()
+        if _on_loop(loop):
+            _set_exception(future, error)
+        else:
+            loop.call_soon_threadsafe(_set_exception, future, error)
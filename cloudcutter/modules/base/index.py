@@ -0,0 +1,295 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+from asyncio import Future
+from dataclasses import dataclass, fields
+from functools import partial
+from operator import attrgetter
+from threading import RLock
+from typing import Any, Callable, Hashable, Iterable, NamedTuple
+from weakref import ref
+
+from .utils import EventHandler
+
+# key of waiters matching the entire event value
+VALUE_KEY = "__value__"
+_MISSING = object()
+_KEY_GETTERS: dict[str, Callable[[Any], Any]] = {}
+
+
+def event_key(event: Any, key: str) -> Any:
+    if key == VALUE_KEY:
+        return tuple(getattr(event, f.name) for f in fields(event))
+    try:
+        getter = _KEY_GETTERS[key]
+    except KeyError:
+        getter = _KEY_GETTERS[key] = attrgetter(key)
+    try:
+        return getter(event)
+    except AttributeError:
+        return _MISSING
+
+
+class Subscription(NamedTuple):
+    func: EventHandler | None
+    obj: type | object
+    # receive a list of events, if the event class delivers them in batches
+    batch: bool = False
+    # only match events whose attribute (dotted path) equals the value
+    key: str | None = None
+    value: Hashable = None
+    # only match events for which this returns True
+    predicate: Callable[[Any], bool] | None = None
+
+    @property
+    def filtered(self) -> bool:
+        return (
+            not isinstance(self.obj, type)
+            or self.key is not None
+            or self.predicate is not None
+        )
+
+    def accepts(self, event: Any) -> bool:
+        if not isinstance(self.obj, type):
+            return event == self.obj
+        if self.key is not None and event_key(event, self.key) != self.value:
+            return False
+        if self.predicate is not None and not self.predicate(event):
+            return False
+        return True
+
+
+@dataclass
+class EventBatch:
+    events: list
+
+
+class Route:
+    def __init__(self):
+        # modules (and their handlers) subscribed to this type
+        self.modules: dict[ref, tuple[Subscription, ...]] = {}
+        # modules receiving every event of this type
+        self.always: dict[ref, None] = {}
+        # key -> value -> modules subscribed to that value
+        self.keyed: dict[str, dict[Hashable, dict[ref, None]]] = {}
+        # subscriptions that need checking one by one
+        self.filtered: list[tuple[ref, Subscription]] = []
+
+    def add(self, module_ref: ref, subs: tuple[Subscription, ...]) -> None:
+        self.modules[module_ref] = subs
+        for sub in subs:
+            if not sub.filtered:
+                self.always[module_ref] = None
+            elif isinstance(sub.obj, type) and sub.key is not None:
+                values = self.keyed.setdefault(sub.key, {})
+                values.setdefault(sub.value, {})[module_ref] = None
+            else:
+                self.filtered.append((module_ref, sub))
+
+    def targets(self, event: Any) -> Iterable[ref]:
+        if not self.keyed and not self.filtered:
+            return self.always
+        targets = dict(self.always)
+        for key, values in self.keyed.items():
+            try:
+                targets |= values.get(event_key(event, key), {})
+            except TypeError:
+                pass  # unhashable key value
+        for module_ref, sub in self.filtered:
+            if module_ref not in targets and sub.accepts(event):
+                targets[module_ref] = None
+        return targets
+
+
+class Waiters:
+    def __init__(self):
+        # futures checked one by one
+        self.any: dict[Future, Subscription] = {}
+        # key -> value -> futures waiting for that value
+        self.keyed: dict[str, dict[Hashable, dict[Future, Subscription]]] = {}
+
+    def add(self, future: Future, sub: Subscription) -> None:
+        if sub.key is None:
+            self.any[future] = sub
+            return
+        values = self.keyed.setdefault(sub.key, {})
+        values.setdefault(sub.value, {})[future] = sub
+
+    def remove(self, future: Future, sub: Subscription) -> bool:
+        if sub.key is None:
+            return self.any.pop(future, None) is not None
+        values = self.keyed.get(sub.key, {})
+        waiters = values.get(sub.value, {})
+        if waiters.pop(future, None) is None:
+            return False
+        if not waiters:
+            values.pop(sub.value)
+        if not values:
+            self.keyed.pop(sub.key)
+        return True
+
+    def pop(self, event: Any, exact: bool) -> list[Future]:
+        futures = []
+        for key, values in list(self.keyed.items()):
+            if key == VALUE_KEY and not exact:
+                continue
+            try:
+                value = event_key(event, key)
+                waiters = values.get(value)
+            except TypeError:
+                continue  # unhashable key value
+            if not waiters:
+                continue
+            for future, sub in list(waiters.items()):
+                if sub.predicate is None or sub.predicate(event):
+                    waiters.pop(future)
+                    futures.append(future)
+            if not waiters:
+                values.pop(value)
+            if not values:
+                self.keyed.pop(key)
+        for future, sub in list(self.any.items()):
+            if sub.accepts(event):
+                self.any.pop(future)
+                futures.append(future)
+        return futures
+
+    def __bool__(self) -> bool:
+        return bool(self.any or self.keyed)
+
+
+class SubscriberIndex:
+    def __init__(self):
+        self._lock = RLock()
+        # subscriptions of all registered modules (held weakly)
+        self._modules: dict[ref, tuple[Subscription, ...]] = {}
+        # event type -> modules (and their handlers) that should receive it
+        self._routes: dict[type, Route] = {}
+        # event type -> one-shot futures awaiting an event
+        self._waiters: dict[type, Waiters] = {}
+        # number of futures in _waiters
+        self.waiting = 0
+        # callables receiving every broadcast event
+        self.sinks: tuple[Callable[[Any], None], ...] = ()
+
+    @staticmethod
+    def _matches(cls: type, obj: type | object) -> bool:
+        if isinstance(obj, type):
+            return issubclass(cls, obj)
+        # dataclass equality only holds for the exact same class
+        return type(obj) is cls
+
+    def register(self, module: Any, subs: Iterable[Subscription]) -> None:
+        with self._lock:
+            self._modules[ref(module, self._collect)] = tuple(subs)
+            self._routes = {}
+
+    def unregister(self, module: Any) -> None:
+        with self._lock:
+            self._modules.pop(ref(module), None)
+            self._routes = {}
+
+    def _collect(self, module_ref: ref) -> None:
+        # called by the GC - possibly while the lock is held in this thread
+        self._routes = {}
+
+    def lookup(self, cls: type) -> Route:
+        try:
+            return self._routes[cls]
+        except KeyError:
+            pass
+        with self._lock:
+            for module_ref in [r for r in self._modules if r() is None]:
+                self._modules.pop(module_ref, None)
+            route = Route()
+            for module_ref, subs in self._modules.items():
+                subs = tuple(sub for sub in subs if self._matches(cls, sub.obj))
+                if subs:
+                    route.add(module_ref, subs)
+            self._routes[cls] = route
+        return route
+
+    def handlers(self, module: Any, cls: type) -> tuple[Subscription, ...]:
+        return self.lookup(cls).modules.get(ref(module), ())
+
+    @staticmethod
+    def _overflow(cls: type) -> tuple[Any, Callable[[Any], Hashable] | None]:
+        # overflow policy, and the key of events that may replace each other
+        return cls.__overflow__, getattr(cls.__policy__, "key", None)
+
+    def deliver(self, event: Any) -> None:
+        cls = type(event)
+        overflow, key = self._overflow(cls)
+        for module_ref in self.lookup(cls).targets(event):
+            module = module_ref()
+            if module is not None:
+                # the EventMixin dispatches the event to matching handlers
+                module.queue.put(event, cls, overflow, key)
+
+    def deliver_batch(self, cls: type, events: list) -> None:
+        route = self.lookup(cls)
+        if not route.keyed and not route.filtered:
+            targets = {module_ref: events for module_ref in route.always}
+        else:
+            # only pass the events each module is subscribed to
+            targets = {}
+            for event in events:
+                for module_ref in route.targets(event):
+                    targets.setdefault(module_ref, []).append(event)
+        overflow, key = self._overflow(cls)
+        for module_ref, module_events in targets.items():
+            module = module_ref()
+            if module is not None:
+                module.queue.put(EventBatch(module_events), cls, overflow, key)
+
+    def add_sink(self, sink: Callable[[Any], None]) -> None:
+        with self._lock:
+            self.sinks += (sink,)
+
+    def remove_sink(self, sink: Callable[[Any], None]) -> None:
+        with self._lock:
+            self.sinks = tuple(s for s in self.sinks if s != sink)
+
+    def add_waiter(self, future: Future, sub: Subscription) -> None:
+        obj = sub.obj
+        cls = obj if isinstance(obj, type) else type(obj)
+        if not isinstance(obj, type):
+            # index value waiters by all field values, if possible
+            try:
+                value = event_key(obj, VALUE_KEY)
+                hash(value)
+                sub = Subscription(None, cls, key=VALUE_KEY, value=value)
+            except TypeError:
+                pass
+        with self._lock:
+            self._waiters.setdefault(cls, Waiters()).add(future, sub)
+            self.waiting += 1
+        # unregister once cancelled (or timed out), if not matched by then
+        future.add_done_callback(partial(self._discard_waiter, cls, sub))
+
+    def _discard_waiter(self, cls: type, sub: Subscription, future: Future) -> None:
+        with self._lock:
+            waiters = self._waiters.get(cls)
+            if not waiters or not waiters.remove(future, sub):
+                return
+            self.waiting -= 1
+            if not waiters:
+                self._waiters.pop(cls)
+
+    def pop_waiters(self, event: Any) -> list[Future]:
+        if not self._waiters:
+            return []
+        futures = []
+        with self._lock:
+            for cls in type(event).__mro__:
+                waiters = self._waiters.get(cls)
+                if not waiters:
+                    continue
+                popped = waiters.pop(event, exact=cls is type(event))
+                self.waiting -= len(popped)
+                futures += popped
+                if not waiters:
+                    self._waiters.pop(cls)
+        return [future for future in futures if not future.done()]
+
+
+SUBSCRIBERS = SubscriberIndex()
@@ -0,0 +1,152 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+import asyncio
+import pickle
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from queue import SimpleQueue
+from threading import Thread, current_thread
+from time import monotonic, monotonic_ns
+from typing import Any, BinaryIO, Generator
+
+from .index import SUBSCRIBERS
+from .logger import LoggerMixin
+from .policy import COALESCER
+from .utils import CURRENT_MODULE
+
+JOURNAL_MAGIC = b"CCEJ\x01"
+RECORD_HEADER = struct.Struct("<I")
+
+
+@dataclass
+class JournalRecord:
+    timestamp: int  # monotonic, in nanoseconds
+    module: str | None
+    thread: str
+    event: Any
+
+
+@dataclass
+class JournalStats:
+    events: int
+    duration: float
+    skipped: int = 0
+
+
+class EventJournal(LoggerMixin):
+    _thread: Thread | None = None
+    _file: BinaryIO | None = None
+    written: int = 0
+    skipped: int = 0
+
+    def __init__(self, path: Path):
+        super().__init__()
+        self.path = path
+        self._queue: SimpleQueue[tuple | None] = SimpleQueue()
+
+    def start(self) -> None:
+        if self._thread:
+            return
+        is_new = not self.path.is_file() or self.path.stat().st_size == 0
+        self._file = self.path.open("ab")
+        if is_new:
+            self._file.write(JOURNAL_MAGIC)
+        self._thread = Thread(
+            target=self._writer_thread,
+            name="EventJournal",
+            daemon=True,
+        )
+        self._thread.start()
+        SUBSCRIBERS.add_sink(self.record)
+        self.info(f"Recording events to {self.path}")
+
+    def stop(self) -> None:
+        if not self._thread:
+            return
+        SUBSCRIBERS.remove_sink(self.record)
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._file.close()
+        self._file = None
+        self.info(f"Recorded {self.written} events ({self.skipped} skipped)")
+
+    def record(self, event: Any) -> None:
+        # called on the hot path - defer everything to the writer thread
+        module = CURRENT_MODULE.get()
+        self._queue.put(
+            (
+                monotonic_ns(),
+                module and type(module).__name__,
+                current_thread().name,
+                event,
+            )
+        )
+
+    def _writer_thread(self) -> None:
+        while True:
+            item = self._queue.get()
+            while item is not None:
+                try:
+                    data = pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL)
+                except Exception as e:
+                    self.debug(f"Couldn't record {type(item[3]).__name__}: {e}")
+                    self.skipped += 1
+                else:
+                    self._file.write(RECORD_HEADER.pack(len(data)))
+                    self._file.write(data)
+                    self.written += 1
+                if self._queue.empty():
+                    break
+                item = self._queue.get()
+            self._file.flush()
+            if item is None:
+                return
+
+
+def read_journal(path: Path) -> Generator[JournalRecord, None, None]:
+    with path.open("rb") as f:
+        if f.read(len(JOURNAL_MAGIC)) != JOURNAL_MAGIC:
+            raise ValueError(f"Not an event journal: {path}")
+        while header := f.read(RECORD_HEADER.size):
+            (length,) = RECORD_HEADER.unpack(header)
+            data = f.read(length)
+            if len(data) != length:
+                break  # truncated by an unclean shutdown
+            yield JournalRecord(*pickle.loads(data))
+
+
+async def replay_journal(
+    path: Path,
+    speed: float = None,
+    skip: tuple[type, ...] = (),
+) -> JournalStats:
+    # speed: None/0 - as fast as possible, 1.0 - recorded speed
+    # skip: event types not to broadcast again (i.e. commands with side effects)
+    count = 0
+    skipped = 0
+    start = monotonic()
+    first = None
+    for record in read_journal(path):
+        if isinstance(record.event, skip):
+            skipped += 1
+            continue
+        if speed:
+            if first is None:
+                first = record.timestamp
+            delay = (record.timestamp - first) / 1e9 / speed - (monotonic() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        record.event.broadcast()
+        count += 1
+        if count % 1000 == 0:
+            # let module loops on this thread catch up
+            await asyncio.sleep(0)
+    # deliver any events still held by coalescing policies
+    COALESCER.flush()
+    return JournalStats(
+        events=count,
+        duration=monotonic() - start,
+        skipped=skipped,
+    )
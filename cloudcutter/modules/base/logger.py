@@ -1,10 +1,32 @@
 #  Copyright (c) Kuba Szczodrzyński 2023-9-8.
 
 import logging
-from logging import CRITICAL, DEBUG, ERROR, INFO, WARNING, log
+from logging import CRITICAL, DEBUG, ERROR, INFO, WARNING, Handler, LogRecord, log
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
 from threading import current_thread
 
 VERBOSE = DEBUG // 2
+ROOT = logging.getLogger()
+
+
+class LogMessage:
+    # formatted only when a handler actually emits the record
+    __slots__ = ("name", "thread", "msg", "args")
+
+    def __init__(self, name: str, thread: str | None, msg: str, args: tuple):
+        self.name = name
+        self.thread = thread
+        self.msg = msg
+        self.args = args
+
+    def __str__(self) -> str:
+        msg = str(self.msg)
+        if self.args:
+            msg = msg % self.args
+        if self.thread:
+            return f"{self.name}<{self.thread}>: {msg}"
+        return f"{self.name}: {msg}"
 
 
 class LoggerMixin:
@@ -33,13 +55,69 @@ class LoggerMixin:
         self.log(CRITICAL, msg, *args, **kwargs)
 
     def log(self, level, msg, *args, **kwargs):
-        if logging.getLogger().level <= DEBUG:
-            msg = f"{type(self).__name__}<{current_thread().name}>: {msg}"
-        else:
-            msg = f"{type(self).__name__}: {msg}"
-        log(
-            level,
-            msg,
-            *args,
-            **kwargs,
+        if not ROOT.isEnabledFor(level):
+            return
+        thread = current_thread().name if ROOT.isEnabledFor(DEBUG) else None
+        message = LogMessage(type(self).__name__, thread, msg, args)
+        if not LOG_QUEUE.running:
+            message = str(message)
+        # otherwise %-style args are formatted by the writer thread
+        log(level, message, **kwargs)
+
+
+class DeferredQueueHandler(QueueHandler):
+    def prepare(self, record: LogRecord) -> LogRecord:
+        # leave all formatting to the writer thread
+        return record
+
+
+class DeferredQueueListener(QueueListener):
+    def prepare(self, record: LogRecord) -> LogRecord:
+        # handlers expect a plain string message
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class LogQueue:
+    # moves root logger handlers to a background writer thread, so that
+    # logging never blocks on terminal or file I/O
+    _listener: QueueListener | None = None
+
+    def __init__(self):
+        self.handlers: list[Handler] = []
+
+    @property
+    def running(self) -> bool:
+        return self._listener is not None
+
+    def start(self) -> None:
+        if self._listener:
+            return
+        queue = SimpleQueue()
+        self.handlers = ROOT.handlers[:]
+        self._listener = DeferredQueueListener(
+            queue,
+            *self.handlers,
+            respect_handler_level=True,
         )
+        for handler in self.handlers:
+            ROOT.removeHandler(handler)
+        ROOT.addHandler(DeferredQueueHandler(queue))
+        self._listener.start()
+
+    def stop(self) -> None:
+        if not self._listener:
+            return
+        # writes everything that's still queued
+        self._listener.stop()
+        self._listener = None
+        for handler in ROOT.handlers[:]:
+            if isinstance(handler, DeferredQueueHandler):
+                ROOT.removeHandler(handler)
+        for handler in self.handlers:
+            ROOT.addHandler(handler)
+        self.handlers = []
+
+
+LOG_QUEUE = LogQueue()
@@ -1,64 +1,110 @@
 #  Copyright (c) Kuba Szczodrzyński 2023-9-9.
 
+import asyncio
 from asyncio import Future
 from dataclasses import dataclass
-from typing import Any, Awaitable, Callable, Type
+from typing import Any, Awaitable, Callable, ClassVar, Hashable, Type
 
 from .future import FutureMixin
-from .utils import T, make_attr_dict
+from .index import SUBSCRIBERS, Subscription
+from .policy import COALESCER, EventPolicy
+from .queue import Overflow
+from .utils import T
 
 
 @dataclass
 class BaseEvent:
+    __policy__: ClassVar[EventPolicy | None] = None
+    __overflow__: ClassVar[Overflow] = Overflow.BLOCK
+    # attribute (dotted path) of events that must be handled in order
+    __ordering__: ClassVar[str | None] = None
+
     def __await__(self):
+        return (yield from self.wait())
+
+    def wait(self, timeout: float = None) -> Future:
+        # wait for an event equal to this one
         setattr(self, "__used__", True)
         future = FutureMixin.make_future()
-        make_attr_dict(type(self), "__subscribers__")[future] = self
-        yield from future
+        SUBSCRIBERS.add_waiter(future, Subscription(None, self))
+        _expire_after(future, timeout)
+        return future
 
     @classmethod
-    def any(cls: Type[T]) -> Future[T]:
+    def any(
+        cls: Type[T],
+        *,
+        key: str = None,
+        value: Hashable = None,
+        predicate: Callable[[T], bool] = None,
+        timeout: float = None,
+    ) -> Future[T]:
         future = FutureMixin.make_future()
-        make_attr_dict(cls, "__subscribers__")[future] = cls
+        sub = Subscription(None, cls, key=key, value=value, predicate=predicate)
+        SUBSCRIBERS.add_waiter(future, sub)
+        _expire_after(future, timeout)
         return future
 
     def broadcast(self) -> None:
         setattr(self, "__used__", True)
-        subs: dict[Any | Future, type | object] = dict()
-        # find subscribers of all superclasses
-        cls = type(self)
-        while cls.__base__:
-            # |= will replace EventMixin keys (but the value doesn't matter anyway)
-            # but will not remove any Futures, since they're unique
-            # and their value (subscribed object) will be preserved
-            subs |= getattr(cls, "__subscribers__", {})
-            cls = cls.__base__
-        # fill event queues and resolve futures
-        futures = set()
-        for sub, obj in subs.items():
-            if isinstance(sub, Future):
-                # make sure the object matches
-                type_matches = isinstance(obj, type) and isinstance(self, obj)
-                value_matches = self == obj
-                if type_matches or value_matches:
-                    FutureMixin.resolve_future(sub, self)
-                    futures.add(sub)
-            else:
-                # the EventMixin handles dispatching the object, based on type
-                sub.queue.put(self)
-        # remove all used futures
-        cls = type(self)
-        while cls.__base__:
-            for future in futures:
-                getattr(cls, "__subscribers__", {}).pop(future, None)
-            cls = cls.__base__
+        for sink in SUBSCRIBERS.sinks:
+            sink(self)
+        # resolve futures waiting for this event
+        for future in SUBSCRIBERS.pop_waiters(self):
+            FutureMixin.resolve_future(future, self)
+        # hold the event, if the class declares a coalescing policy
+        if policy := type(self).__policy__:
+            COALESCER.submit(self, policy)
+            return
+        # fill event queues of modules subscribed to this type (or superclasses)
+        SUBSCRIBERS.deliver(self)
 
     def __del__(self):
         if not hasattr(self, "__used__"):
             raise RuntimeError(f"Event '{self}' never broadcast nor awaited")
 
 
-@dataclass
+def _expire_after(future: Future, timeout: float | None) -> None:
+    if timeout is None:
+        return
+    handle = future.get_loop().call_later(timeout, _expire, future, timeout)
+    future.add_done_callback(lambda _: handle.cancel())
+
+
+def _expire(future: Future, timeout: float) -> None:
+    if not future.done():
+        future.set_exception(TimeoutError(f"No event received in {timeout} s"))
+
+
+async def wait_any(
+    *waits: Future | Type[BaseEvent] | BaseEvent,
+    timeout: float = None,
+) -> BaseEvent:
+    # wait for whichever event comes first - classes match any event of that type,
+    # futures come from any()/wait() (e.g. to pass a key or predicate)
+    futures = []
+    for wait in waits:
+        if isinstance(wait, type):
+            wait = wait.any()
+        elif isinstance(wait, BaseEvent):
+            wait = wait.wait()
+        futures.append(wait)
+    try:
+        done, _ = await asyncio.wait(
+            futures,
+            timeout=timeout,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+    finally:
+        # unregister the remaining waiters
+        for future in futures:
+            future.cancel()
+    if not done:
+        raise TimeoutError(f"No event received in {timeout} s")
+    return next(future for future in futures if future in done).result()
+
+
+@dataclass(slots=True)
 class MethodCallEvent:
     future: Future
     func: Callable[..., Awaitable[Any]]
@@ -66,6 +112,6 @@ class MethodCallEvent:
     kwargs: dict
 
 
-@dataclass
+@dataclass(slots=True)
 class CoroutineCallEvent:
     coro: Awaitable[Any]
@@ -0,0 +1,106 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+from dataclasses import dataclass
+from threading import Condition, Thread
+from time import monotonic
+from typing import Any, Callable, Hashable
+
+from .index import SUBSCRIBERS
+
+
+@dataclass
+class EventPolicy:
+    # how long (in seconds) to hold events before delivering them
+    window: float
+
+
+@dataclass
+class Coalesce(EventPolicy):
+    # only the latest event per key is delivered (or the latest one, if None)
+    key: Callable[[Any], Hashable] | None = None
+
+
+@dataclass
+class Batch(EventPolicy):
+    # deliver early if this many events are pending (0 - no limit)
+    size: int = 0
+
+
+class _Bucket:
+    def __init__(self, policy: EventPolicy, deadline: float):
+        self.policy = policy
+        self.deadline = deadline
+        self.latest: dict[Hashable, Any] = {}
+        self.events: list[Any] = []
+
+    def add(self, event: Any) -> bool:
+        match self.policy:
+            case Coalesce(key=key):
+                key = key(event) if key else None
+                # move the key to the end, to keep delivery order
+                self.latest.pop(key, None)
+                self.latest[key] = event
+            case Batch(size=size):
+                self.events.append(event)
+                return bool(size) and len(self.events) >= size
+        return False
+
+    def collect(self) -> list[Any]:
+        return self.events or list(self.latest.values())
+
+
+class EventCoalescer:
+    _thread: Thread | None = None
+
+    def __init__(self):
+        self._cond = Condition()
+        self._buckets: dict[type, _Bucket] = {}
+
+    def submit(self, event: Any, policy: EventPolicy) -> None:
+        cls = type(event)
+        with self._cond:
+            bucket = self._buckets.get(cls)
+            if bucket is None:
+                bucket = _Bucket(policy, deadline=monotonic() + policy.window)
+                self._buckets[cls] = bucket
+                if self._thread is None:
+                    self._thread = Thread(
+                        target=self._flush_thread,
+                        name="EventCoalescer",
+                        daemon=True,
+                    )
+                    self._thread.start()
+                self._cond.notify()
+            if not bucket.add(event):
+                return
+            self._buckets.pop(cls)
+        # batch is full - deliver it right away
+        self._deliver(cls, bucket)
+
+    def flush(self) -> None:
+        with self._cond:
+            buckets, self._buckets = self._buckets, {}
+        for cls, bucket in buckets.items():
+            self._deliver(cls, bucket)
+
+    @staticmethod
+    def _deliver(cls: type, bucket: _Bucket) -> None:
+        SUBSCRIBERS.deliver_batch(cls, bucket.collect())
+
+    def _flush_thread(self) -> None:
+        while True:
+            with self._cond:
+                while not self._buckets:
+                    self._cond.wait()
+                now = monotonic()
+                due = [c for c, b in self._buckets.items() if b.deadline <= now]
+                if not due:
+                    deadline = min(b.deadline for b in self._buckets.values())
+                    self._cond.wait(deadline - now)
+                    continue
+                ready = [(cls, self._buckets.pop(cls)) for cls in due]
+            for cls, bucket in ready:
+                self._deliver(cls, bucket)
+
+
+COALESCER = EventCoalescer()
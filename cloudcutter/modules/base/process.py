@@ -0,0 +1,347 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+import asyncio
+import os
+import re
+import shlex
+import signal
+import subprocess
+from asyncio import Future, StreamReader
+from asyncio.subprocess import PIPE, Process
+from collections import deque
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass
+from subprocess import DEVNULL, list2cmdline
+from threading import Lock
+from time import perf_counter
+from typing import Any, AsyncGenerator, Callable, Sequence
+from uuid import uuid4
+
+from .future import FutureMixin
+from .logger import LoggerMixin
+
+OutputCallback = Callable[[bytes], Any]
+# output read at once, if not passed to an OutputCallback line by line
+READ_SIZE = 64 * 1024
+# time to read the rest of the output of a killed command, in seconds
+DRAIN_TIMEOUT = 1.0
+
+
+class Default:
+    # an argument that falls back to the ProcessRunner's setting
+
+    def __repr__(self) -> str:
+        return "DEFAULT"
+
+
+DEFAULT = Default()
+
+
+@dataclass
+class CommandResult:
+    args: tuple[str, ...]
+    returncode: int
+    stdout: bytes
+    stderr: bytes
+    # wall time from spawning the child until it exited, in seconds
+    elapsed: float
+    # killed after running out of time - the output is what it printed so far
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+    def check(self) -> "CommandResult":
+        if not self.ok:
+            raise RuntimeError(
+                f"Command {self.args} failed ({self.returncode}): "
+                f"{(self.stdout or self.stderr)}"
+            )
+        return self
+
+
+def _split(pattern: re.Pattern, data: bytes) -> tuple[list[tuple], bytes]:
+    # output of every finished command, and whatever follows the last one
+    parts = []
+    end = 0
+    for match in pattern.finditer(data):
+        parts.append(match.groups())
+        end = match.end()
+    return parts, data[end:]
+
+
+class ProcessRunner(LoggerMixin):
+    # maximum number of child processes running at once, for all modules
+    limit: int = 4
+    # default timeout of a single invocation, in seconds (None - no timeout)
+    timeout: float | None = 30.0
+    # number of finished commands kept in 'history'
+    history_size: int = 256
+
+    def __init__(self):
+        super().__init__()
+        self._lock = Lock()
+        self._running = 0
+        self._waiters: deque[Future] = deque()
+        self.history: deque[CommandResult] = deque(maxlen=self.history_size)
+
+    async def run(
+        self,
+        *args: str,
+        timeout: float | None | Default = DEFAULT,
+        check: bool = True,
+        on_output: OutputCallback = None,
+    ) -> CommandResult:
+        # run a command, optionally passing every line of its stdout
+        # to 'on_output' as soon as it's printed
+        if isinstance(timeout, Default):
+            timeout = self.timeout
+        result = await self._run(args, timeout, on_output)
+        self._record(result)
+        if result.timed_out:
+            raise TimeoutError(f"Command {args} timed out after {timeout} s")
+        return result.check() if check else result
+
+    async def run_batch(
+        self,
+        *commands: Sequence[str],
+        timeout: float | None | Default = DEFAULT,
+        check: bool = True,
+    ) -> list[CommandResult]:
+        # run several commands one after another, in a single shell
+        # invocation if possible - every command runs, even if one fails
+        commands = [tuple(command) for command in commands]
+        if len(commands) < 2 or not self.is_batch_supported():
+            return [
+                await self.run(*command, timeout=timeout, check=check)
+                for command in commands
+            ]
+        if isinstance(timeout, Default):
+            timeout = self.timeout
+        marker = f"--- {uuid4().hex}"
+        batch = await self._run(self._batch_args(commands, marker), timeout, None)
+        pattern = re.compile(rb"(.*?)" + marker.encode() + rb" (\d+)\r?\n", re.DOTALL)
+        stdout, stdout_rest = _split(pattern, batch.stdout)
+        stderr, stderr_rest = _split(pattern, batch.stderr)
+        done = min(len(stdout), len(stderr))
+        # not if it was only the shell exiting that ran out of time
+        timed_out = batch.timed_out and done < len(commands)
+        if not timed_out and done != len(commands):
+            raise RuntimeError(f"Batch of {commands} failed: {batch.stderr}")
+        # the elapsed time can't be measured per-command - split evenly
+        # between the ones that ran
+        elapsed = batch.elapsed / (done + timed_out)
+        results = [
+            CommandResult(
+                args=command,
+                returncode=int(code),
+                stdout=out,
+                stderr=err,
+                elapsed=elapsed,
+            )
+            for command, (out, code), (err, _) in zip(commands, stdout, stderr)
+        ]
+        if timed_out:
+            # the command that was running - the rest never started
+            results.append(
+                CommandResult(
+                    args=commands[done],
+                    returncode=batch.returncode,
+                    stdout=stdout_rest,
+                    stderr=stderr_rest,
+                    elapsed=elapsed,
+                    timed_out=True,
+                )
+            )
+        for result in results:
+            self._record(result)
+        if timed_out:
+            raise TimeoutError(
+                f"Command {commands[done]} timed out after {timeout} s (in a batch)"
+            )
+        if check:
+            for result in results:
+                result.check()
+        return results
+
+    @staticmethod
+    def is_batch_supported() -> bool:
+        return os.name in ("nt", "posix")
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        # latency of recent commands, by executable name
+        stats = {}
+        for result in list(self.history):
+            item = stats.setdefault(
+                result.args[0],
+                dict(count=0, failed=0, timeouts=0, total_ms=0.0, max_ms=0.0),
+            )
+            item["count"] += 1
+            item["failed"] += not result.ok
+            item["timeouts"] += result.timed_out
+            item["total_ms"] += result.elapsed * 1000
+            item["max_ms"] = max(item["max_ms"], result.elapsed * 1000)
+        for item in stats.values():
+            item["mean_ms"] = item["total_ms"] / item["count"]
+        return stats
+
+    async def _run(
+        self,
+        args: Sequence[str],
+        timeout: float | None,
+        on_output: OutputCallback | None,
+    ) -> CommandResult:
+        # in a new process group, killed as a whole - children left running
+        # would keep the pipes (and the wait for the command) open
+        if os.name == "nt":
+            kwargs = dict(creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
+        else:
+            kwargs = dict(start_new_session=True)
+        async with self._slot():
+            start = perf_counter()
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                stdout=PIPE,
+                stderr=PIPE,
+                **kwargs,
+            )
+            # filled as it's read - kept if the command times out
+            stdout, stderr = bytearray(), bytearray()
+            timed_out = False
+            try:
+                await asyncio.wait_for(
+                    self._communicate(process, on_output, stdout, stderr),
+                    timeout,
+                )
+            except asyncio.TimeoutError:
+                timed_out = True
+                await self._kill(process)
+                # up to EOF - unless something outside the group holds the pipes
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(
+                        self._communicate(process, None, stdout, stderr),
+                        DRAIN_TIMEOUT,
+                    )
+            except asyncio.CancelledError:
+                await self._kill(process)
+                raise
+            return CommandResult(
+                args=tuple(args),
+                returncode=process.returncode,
+                stdout=bytes(stdout),
+                stderr=bytes(stderr),
+                elapsed=perf_counter() - start,
+                timed_out=timed_out,
+            )
+
+    def _record(self, result: CommandResult) -> None:
+        self.history.append(result)
+        if result.timed_out:
+            self.verbose(f"Command {result.args} timed out")
+            return
+        self.verbose(
+            f"Command {result.args} finished in {result.elapsed * 1000:.1f} ms"
+        )
+
+    @staticmethod
+    def _batch_args(commands: list[tuple[str, ...]], marker: str) -> list[str]:
+        # print a marker with the exit code after every command,
+        # both to stdout and stderr, so that the output can be split
+        if os.name == "nt":
+            script = " & ".join(
+                f"{list2cmdline(command)} & echo {marker} !errorlevel! "
+                f"& 1>&2 echo {marker} !errorlevel!"
+                for command in commands
+            )
+            return ["cmd", "/d", "/v:on", "/c", script]
+        script = "; ".join(
+            f"{shlex.join(command)}; code=$?; "
+            f"printf '%s %d\\n' '{marker}' $code; "
+            f"printf '%s %d\\n' '{marker}' $code >&2"
+            for command in commands
+        )
+        return ["/bin/sh", "-c", script]
+
+    @staticmethod
+    async def _communicate(
+        process: Process,
+        on_output: OutputCallback | None,
+        stdout: bytearray,
+        stderr: bytearray,
+    ) -> None:
+        async def read(stream: StreamReader, output: bytearray) -> None:
+            while chunk := await stream.read(READ_SIZE):
+                output.extend(chunk)
+
+        async def read_lines() -> None:
+            while line := await process.stdout.readline():
+                stdout.extend(line)
+                on_output(line)
+
+        await asyncio.gather(
+            read_lines() if on_output else read(process.stdout, stdout),
+            read(process.stderr, stderr),
+        )
+        await process.wait()
+
+    @staticmethod
+    async def _kill(process: Process) -> None:
+        # even if the command itself has exited - its children may not have
+        try:
+            if os.name == "nt":
+                # the whole process tree
+                killer = await asyncio.create_subprocess_exec(
+                    "taskkill",
+                    "/f",
+                    "/t",
+                    "/pid",
+                    str(process.pid),
+                    stdout=DEVNULL,
+                    stderr=DEVNULL,
+                )
+                await killer.wait()
+            else:
+                os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await process.wait()
+
+    @asynccontextmanager
+    async def _slot(self) -> AsyncGenerator[None, None]:
+        await self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self) -> None:
+        with self._lock:
+            if self._running < self.limit:
+                self._running += 1
+                return
+            # the waiter may be on any module's loop
+            future = FutureMixin.make_future()
+            self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if future in self._waiters:
+                    self._waiters.remove(future)
+                    raise
+            # the slot was already handed over
+            self._release()
+            raise
+
+    def _release(self) -> None:
+        with self._lock:
+            if not self._waiters:
+                self._running -= 1
+                return
+            # hand the slot over, without decrementing
+            future = self._waiters.popleft()
+        FutureMixin.resolve_future(future)
+
+
+PROCESSES = ProcessRunner()
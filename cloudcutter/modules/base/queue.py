@@ -0,0 +1,186 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+import asyncio
+from asyncio import Future
+from collections import deque
+from enum import Enum, auto
+from threading import Condition, get_ident
+from typing import Any, Callable, Generic, Hashable
+
+from .index import EventBatch
+from .utils import T
+
+
+class Overflow(Enum):
+    # wait until the consumer makes room
+    BLOCK = auto()
+    # discard the oldest queued item of the same kind
+    DROP_OLDEST = auto()
+    # discard the item being put
+    DROP_NEWEST = auto()
+    # merge into the newest queued item of the same kind, keeping the latest
+    # event per key (or discard the item being put, if there's none)
+    COALESCE = auto()
+
+
+class EventQueue(Generic[T]):
+    _waiter: Future | None = None
+    _waiter_thread: int | None = None
+    _closed: bool = False
+    # overflow counters
+    dropped: int = 0
+    blocked: int = 0
+    coalesced: int = 0
+
+    def __init__(self, maxsize: int = 0, overflow: Overflow = None):
+        # 'overflow' - used instead of BLOCK, for consumers that mustn't
+        # hold up producers (which may be running event loops)
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self._lock = Condition()
+        # (item, kind) - kind is None for items that can't be dropped
+        self._items: deque[tuple[T, type | None]] = deque()
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def full(self) -> bool:
+        return 0 < self.maxsize <= len(self._items)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def put(
+        self,
+        item: T,
+        kind: type = None,
+        overflow: Overflow = Overflow.BLOCK,
+        key: Callable[[T], Hashable] = None,
+    ) -> None:
+        # may be called from any thread; 'key' - of events that may replace
+        # each other (also those in an EventBatch)
+        with self._lock:
+            entry = (item, kind)
+            if self.full() and not self._overflow(entry, overflow, key):
+                return
+            self._items.append(entry)
+            waiter, self._waiter = self._waiter, None
+        if waiter:
+            self._wakeup(waiter)
+
+    def _overflow(
+        self,
+        entry: tuple,
+        overflow: Overflow,
+        key: Callable[[Any], Hashable] | None,
+    ) -> bool:
+        # called with the lock held; returns whether to append the entry
+        item, kind = entry
+        if kind is None:
+            # never drop method calls - let the queue grow instead
+            return True
+        if overflow == Overflow.BLOCK and self.overflow:
+            overflow = self.overflow
+        if overflow == Overflow.BLOCK:
+            if get_ident() == self._waiter_thread:
+                # the consumer can't wait for itself
+                return True
+            self.blocked += 1
+            self._lock.wait_for(lambda: not self.full() or self._closed)
+            return True
+        if overflow == Overflow.COALESCE:
+            for i in range(len(self._items) - 1, -1, -1):
+                queued, queued_kind = self._items[i]
+                if queued_kind is kind:
+                    self._items[i] = (self._merge(queued, item, key), kind)
+                    return False
+        if overflow == Overflow.DROP_OLDEST:
+            # make room for the newer item
+            for i, (queued, queued_kind) in enumerate(self._items):
+                if queued_kind is kind:
+                    del self._items[i]
+                    self.dropped += len(_events(queued))
+                    return True
+        self.dropped += len(_events(item))
+        return False
+
+    def _merge(self, queued: Any, item: Any, key: Callable | None) -> Any:
+        # the latest event per key, in order of their arrival
+        latest = {}
+        events = _events(queued) + _events(item)
+        for event in events:
+            value = key(event) if key else None
+            latest.pop(value, None)
+            latest[value] = event
+        self.coalesced += len(events) - len(latest)
+        if len(latest) == 1 and not isinstance(item, EventBatch):
+            return item
+        return EventBatch(list(latest.values()))
+
+    def open(self) -> None:
+        self._closed = False
+
+    def close(self) -> None:
+        # wake up the consumer, without discarding queued items
+        with self._lock:
+            self._closed = True
+            waiter, self._waiter = self._waiter, None
+            self._lock.notify_all()
+        if waiter:
+            self._wakeup(waiter)
+
+    async def get(self) -> T | None:
+        # single consumer only - returns None once the queue is closed and empty
+        self._waiter_thread = get_ident()
+        while True:
+            with self._lock:
+                if self._items:
+                    return self._pop()
+                if self._closed:
+                    return None
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiter = waiter
+            try:
+                await waiter
+            finally:
+                with self._lock:
+                    if self._waiter is waiter:
+                        self._waiter = None
+
+    def get_nowait(self) -> T | None:
+        with self._lock:
+            return self._pop() if self._items else None
+
+    def _pop(self) -> T:
+        item, _ = self._items.popleft()
+        if self.maxsize:
+            self._lock.notify()
+        return item
+
+    def stats(self) -> dict[str, Any]:
+        return dict(
+            size=len(self._items),
+            dropped=self.dropped,
+            blocked=self.blocked,
+            coalesced=self.coalesced,
+        )
+
+    def _wakeup(self, waiter: Future) -> None:
+        if get_ident() == self._waiter_thread:
+            # already on the consumer's loop
+            self._set_waiter(waiter)
+        else:
+            waiter.get_loop().call_soon_threadsafe(self._set_waiter, waiter)
+
+    @staticmethod
+    def _set_waiter(waiter: Future) -> None:
+        if not waiter.done():
+            waiter.set_result(None)
+
+
+def _events(item: Any) -> list:
+    return item.events if isinstance(item, EventBatch) else [item]
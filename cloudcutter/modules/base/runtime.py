@@ -0,0 +1,38 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+from .utils import T
+
+
+class Runtime:
+    # run all modules as tasks on a single asyncio loop, instead of
+    # starting a thread (with its own loop) for every module
+    reactor: bool = False
+    # size of the executor used for blocking work (None - default)
+    max_workers: int | None = None
+    _executor: ThreadPoolExecutor | None = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="Runtime",
+            )
+        return self._executor
+
+    async def run_blocking(self, func: Callable[..., T], *args: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args))
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+RUNTIME = Runtime()
@@ -0,0 +1,212 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+import asyncio
+import random
+from asyncio import AbstractEventLoop, Future
+from dataclasses import dataclass
+from heapq import heappop, heappush
+from math import ceil
+from threading import Condition, Thread
+from time import monotonic
+from typing import Any, Awaitable, Callable, Generator, Iterable
+
+from .future import FutureMixin
+from .logger import LoggerMixin
+from .model import BaseEvent, wait_any
+from .utils import T
+
+
+@dataclass
+class Backoff:
+    # first delay, in seconds
+    initial: float = 1.0
+    # multiplier applied after each attempt
+    factor: float = 1.0
+    # upper limit of the delay (None - no limit)
+    maximum: float | None = None
+    # random spread, as a fraction of the delay
+    jitter: float = 0.0
+
+    def delays(self) -> Generator[float, None, None]:
+        delay = self.initial
+        while True:
+            if self.maximum is not None:
+                delay = min(delay, self.maximum)
+            if self.jitter:
+                yield delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+            else:
+                yield delay
+            delay *= self.factor
+
+
+class Timer:
+    __slots__ = ("deadline", "interval", "jitter", "callback", "args", "loop", "active")
+
+    def __init__(
+        self,
+        deadline: float,
+        interval: float | None,
+        jitter: float,
+        callback: Callable[..., Any],
+        args: tuple,
+        loop: AbstractEventLoop | None,
+    ):
+        self.deadline = deadline
+        self.interval = interval
+        self.jitter = jitter
+        self.callback = callback
+        self.args = args
+        self.loop = loop
+        self.active = True
+
+    def cancel(self) -> None:
+        self.active = False
+
+
+class Scheduler(LoggerMixin):
+    # all timers share a single wheel thread - timers due within the same
+    # tick (of this many seconds) fire together
+    resolution: float = 0.05
+    _thread: Thread | None = None
+
+    def __init__(self):
+        super().__init__()
+        self._cond = Condition()
+        # tick -> timers due in that tick
+        self._slots: dict[int, list[Timer]] = {}
+        # heap of ticks that have any timers
+        self._ticks: list[int] = []
+
+    def call_later(self, delay: float, callback: Callable, *args: Any) -> Timer:
+        # callback runs on the caller's loop (if any), or on the wheel thread;
+        # coroutine functions are started as tasks
+        return self._add(self._timer(delay, None, 0.0, callback, args))
+
+    def call_every(
+        self,
+        interval: float,
+        callback: Callable,
+        *args: Any,
+        jitter: float = 0.0,
+    ) -> Timer:
+        timer = self._timer(interval, interval, jitter, callback, args)
+        return self._add(timer)
+
+    def sleep(self, delay: float) -> Future[None]:
+        future = FutureMixin.make_future()
+        timer = self.call_later(delay, FutureMixin.resolve_future, future)
+        future.add_done_callback(lambda _: timer.cancel())
+        return future
+
+    async def wait_until(
+        self,
+        condition: Callable[[], Awaitable[T]],
+        backoff: Backoff = None,
+        timeout: float = None,
+        wake: Iterable[type[BaseEvent] | BaseEvent] = (),
+    ) -> T:
+        # poll the condition until it returns something truthy - if any of
+        # the 'wake' events comes, poll it again right away
+        deadline = None if timeout is None else monotonic() + timeout
+        delays = (backoff or Backoff()).delays()
+        while True:
+            if result := await condition():
+                return result
+            delay = next(delays)
+            if deadline is not None:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"Condition not met in {timeout} s")
+                delay = min(delay, remaining)
+            if wake:
+                await wait_any(*wake, self.sleep(delay))
+            else:
+                await self.sleep(delay)
+
+    def _timer(
+        self,
+        delay: float,
+        interval: float | None,
+        jitter: float,
+        callback: Callable,
+        args: tuple,
+    ) -> Timer:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        deadline = monotonic() + self._jitter(delay, jitter)
+        return Timer(deadline, interval, jitter, callback, args, loop)
+
+    @staticmethod
+    def _jitter(delay: float, jitter: float) -> float:
+        if not jitter:
+            return delay
+        return delay * random.uniform(1 - jitter, 1 + jitter)
+
+    def _add(self, timer: Timer) -> Timer:
+        tick = ceil(timer.deadline / self.resolution)
+        with self._cond:
+            slot = self._slots.get(tick)
+            if slot is None:
+                slot = self._slots[tick] = []
+                heappush(self._ticks, tick)
+                if self._ticks[0] == tick:
+                    # due earlier than anything else
+                    self._cond.notify()
+            slot.append(timer)
+            if self._thread is None:
+                self._thread = Thread(
+                    target=self._wheel_thread,
+                    name="Scheduler",
+                    daemon=True,
+                )
+                self._thread.start()
+        return timer
+
+    def _wheel_thread(self) -> None:
+        while True:
+            with self._cond:
+                while not self._ticks:
+                    self._cond.wait()
+                tick = self._ticks[0]
+                delay = tick * self.resolution - monotonic()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue
+                heappop(self._ticks)
+                timers = self._slots.pop(tick)
+            for timer in timers:
+                self._fire(timer)
+
+    def _fire(self, timer: Timer) -> None:
+        if not timer.active:
+            return
+        if timer.interval:
+            # schedule the next run, skipping any that were missed
+            now = monotonic()
+            timer.deadline += self._jitter(timer.interval, timer.jitter)
+            if timer.deadline < now:
+                timer.deadline = now + timer.interval
+            self._add(timer)
+        if timer.loop is None:
+            self._run(timer)
+            return
+        try:
+            timer.loop.call_soon_threadsafe(self._run, timer)
+        except RuntimeError:
+            # the loop is closed
+            timer.cancel()
+
+    def _run(self, timer: Timer) -> None:
+        if not timer.active:
+            return
+        try:
+            result = timer.callback(*timer.args)
+            if asyncio.iscoroutine(result):
+                asyncio.ensure_future(result)
+        except Exception as e:
+            self.exception("Timer callback raised exception", exc_info=e)
+
+
+SCHEDULER = Scheduler()
@@ -0,0 +1,105 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+import asyncio
+from asyncio import Task
+from time import monotonic
+from typing import Any, Awaitable, Callable, Iterable
+
+from .event import EventMixin
+from .logger import LoggerMixin
+
+StepFunc = Callable[[], Awaitable[Any]]
+
+
+class StartupGraph(LoggerMixin):
+    # starts steps (and modules) as soon as everything they require is up;
+    # if any step fails, the ones that started are stopped again
+
+    def __init__(self):
+        super().__init__()
+        # step name -> (start, requires, stop)
+        self.steps: dict[str, tuple[StepFunc, tuple[str, ...], StepFunc | None]] = {}
+        # step name -> how long it took to start, in seconds
+        self.timings: dict[str, float] = {}
+
+    def add(
+        self,
+        name: str,
+        start: StepFunc,
+        requires: Iterable[str] = (),
+        stop: StepFunc = None,
+    ) -> None:
+        if name in self.steps:
+            raise ValueError(f"Startup step '{name}' already added")
+        self.steps[name] = (start, tuple(requires), stop)
+
+    def add_module(self, module: EventMixin, name: str = None) -> None:
+        self.add(
+            name or type(module).__name__,
+            module.start,
+            module.requires,
+            module.stop,
+        )
+
+    def _check(self) -> None:
+        visited = set()
+
+        def visit(name: str, path: tuple[str, ...]) -> None:
+            if name in path:
+                raise ValueError(f"Startup cycle: {' -> '.join(path + (name,))}")
+            if name in visited:
+                return
+            for required in self.steps[name][1]:
+                if required not in self.steps:
+                    raise ValueError(f"'{name}' requires unknown step '{required}'")
+                visit(required, path + (name,))
+            visited.add(name)
+
+        for step in self.steps:
+            visit(step, ())
+
+    async def run(self) -> dict[str, float]:
+        self._check()
+        tasks: dict[str, Task] = {}
+
+        async def run_step(name: str) -> None:
+            start, requires, _ = self.steps[name]
+            # fails as well, if anything required failed
+            await asyncio.gather(*(tasks[required] for required in requires))
+            started = monotonic()
+            try:
+                await start()
+            except Exception as e:
+                self.error(f"Couldn't start {name}: {e!r}")
+                raise
+            self.timings[name] = monotonic() - started
+            self.debug(f"Started {name} in {self.timings[name]:.3f} s")
+
+        started = monotonic()
+        for name in self.steps:
+            tasks[name] = asyncio.create_task(run_step(name))
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                await self._rollback()
+                raise result
+        total = monotonic() - started
+        self.info(
+            f"Started {len(self.steps)} steps in {total:.3f} s: "
+            + ", ".join(f"{name} {t:.3f} s" for name, t in self.timings.items())
+        )
+        return self.timings
+
+    async def _rollback(self) -> None:
+        # stop what started, in reverse order - without leaking
+        # threads and sockets of modules that came up
+        for name in reversed(list(self.timings)):
+            stop = self.steps[name][2]
+            if stop is None:
+                continue
+            try:
+                await stop()
+            except Exception as e:
+                self.error(f"Couldn't stop {name}: {e!r}")
+            else:
+                self.debug(f"Stopped {name}")
@@ -10,6 +10,8 @@ from cloudcutter.modules.base import BaseEvent
 
 @dataclass
 class DhcpLeaseEvent(BaseEvent):
+    __ordering__ = "client"
+
     client: MAC
     address: IPv4Address
     host_name: str | None
@@ -1,12 +1,13 @@
 #  Copyright (c) Kuba Szczodrzyński 2023-9-10.
 
+import asyncio
 from datetime import timedelta
 from ipaddress import IPv4Address, IPv4Network
 from socket import AF_INET, IPPROTO_UDP, SO_BROADCAST, SOCK_DGRAM, SOL_SOCKET, socket
 
 from macaddress import MAC
 
-from cloudcutter.modules.base import ModuleBase
+from cloudcutter.modules.base import RUNTIME, ModuleBase
 from cloudcutter.types import Ip4Config
 
 from .enums import DhcpMessageType, DhcpOptionType, DhcpPacketType
@@ -15,6 +16,9 @@ from .structs import DhcpPacket
 
 
 class DhcpModule(ModuleBase):
+    # serves the interface subnet
+    requires = ("ipconfig",)
+
     ipconfig: Ip4Config | None = None
     range: tuple[IPv4Address, IPv4Address] | None = None
     dns: IPv4Address | None = None
@@ -42,8 +46,19 @@ class DhcpModule(ModuleBase):
         self.sock = socket(AF_INET, SOCK_DGRAM, IPPROTO_UDP)
         self.sock.setsockopt(SOL_SOCKET, SO_BROADCAST, 1)
         self.sock.bind((str(self.ipconfig.address), 67))
+        if RUNTIME.reactor:
+            # read on the shared loop - close() doesn't wake a pool thread
+            # blocked in recvfrom(), which would then hang interpreter exit
+            self.sock.setblocking(False)
         while self.should_run and self.sock is not None:
-            self._process_request()
+            data = await self._receive()
+            self._process_request(data)
+
+    async def _receive(self) -> bytes:
+        if RUNTIME.reactor:
+            return await asyncio.get_running_loop().sock_recv(self.sock, 4096)
+        data, _ = self.sock.recvfrom(4096)
+        return data
 
     async def stop(self) -> None:
         await self.cleanup()
@@ -54,8 +69,7 @@ class DhcpModule(ModuleBase):
             self.sock.close()
         self.sock = None
 
-    def _process_request(self) -> None:
-        data, _ = self.sock.recvfrom(4096)
+    def _process_request(self, data: bytes) -> None:
         try:
             packet = DhcpPacket.unpack(data)
         except Exception as e:
@@ -76,9 +90,11 @@ class DhcpModule(ModuleBase):
         vendor_cid = packet[DhcpOptionType.VENDOR_CLASS_IDENTIFIER]
         param_list = packet[DhcpOptionType.PARAMETER_REQUEST_LIST]
         self.verbose(
-            f"Got BOOT_REQUEST({message_type.name}) "
-            f"from {packet.client_mac_address} "
-            f"(host_name={host_name}, vendor_cid={vendor_cid})"
+            "Got BOOT_REQUEST(%s) from %s (host_name=%s, vendor_cid=%s)",
+            message_type.name,
+            packet.client_mac_address,
+            host_name,
+            vendor_cid,
         )
 
         address = self._choose_ip_address(packet.client_mac_address)
@@ -116,7 +132,9 @@ class DhcpModule(ModuleBase):
                 continue
             self.warning(f"Requested DHCP option {option} not populated")
 
-        self.debug(f"{action} {address} to {packet.client_mac_address} ({host_name})")
+        self.debug(
+            "%s %s to %s (%s)", action, address, packet.client_mac_address, host_name
+        )
         self.sock.sendto(packet.pack(), ("255.255.255.255", 68))
 
         if message_type != DhcpMessageType.DISCOVER:
@@ -4,11 +4,14 @@ from dataclasses import dataclass
 
 from dnslib import RR
 
-from cloudcutter.modules.base import BaseEvent
+from cloudcutter.modules.base import BaseEvent, Batch, Overflow
 
 
 @dataclass
 class DnsQueryEvent(BaseEvent):
+    __policy__ = Batch(window=0.1, size=100)
+    __overflow__ = Overflow.DROP_OLDEST
+
     qname: str
     qtype: str
     rdata: list[str | RR]
@@ -8,19 +8,22 @@ from dnslib.proxy import ProxyResolver
 from dnslib.server import BaseResolver, DNSHandler, DNSServer
 
 from cloudcutter.modules.base import ModuleBase
-from cloudcutter.utils import matches
+from cloudcutter.utils import Matcher
 
 from .events import DnsQueryEvent
 
 
 class DnsModule(ModuleBase, BaseResolver):
+    # binds to the interface address
+    requires = ("ipconfig",)
     # pre-run configuration
     _address: IPv4Address = None
     _port: int = None
     _upstream: IPv4Address = None
     # runtime configuration
     dns_db: list[
-        tuple[str, str, list[str | RR]] | Callable[[str, str], list[str | RR]]
+        tuple[Matcher[str], Matcher[str], list[str | RR]]
+        | Callable[[str, str], list[str | RR]]
     ] = None
     # server handle
     _dns: DNSServer | None = None
@@ -83,13 +86,13 @@ class DnsModule(ModuleBase, BaseResolver):
                         break
                 else:
                     rname, rtype, rdata = handler
-                    if matches(rname, qname) and matches(rtype, qtype):
+                    if rname.matches(qname) and rtype.matches(qtype):
                         break
             else:
                 self.warning(f"No DNS zone for {qtype} {qname}")
                 DnsQueryEvent(qname=qname, qtype=qtype, rdata=[]).broadcast()
                 continue
-            self.debug(f"Answering DNS request {qtype} {qname}")
+            self.debug("Answering DNS request %s %s", qtype, qname)
             DnsQueryEvent(qname=qname, qtype=qtype, rdata=rdata).broadcast()
 
             # send a reply
@@ -122,7 +125,7 @@ class DnsModule(ModuleBase, BaseResolver):
         type: str,
         answer: str | IPv4Address,
     ) -> None:
-        self.dns_db.append((name, type, [str(answer)]))
+        self.dns_db.append((Matcher(name), Matcher(type), [str(answer)]))
 
     def add_upstream(
         self,
@@ -130,8 +133,11 @@ class DnsModule(ModuleBase, BaseResolver):
         rname: str = ".*",
         rtype: str = ".*",
     ) -> None:
+        name_matcher = Matcher(rname)
+        type_matcher = Matcher(rtype)
+
         def handler(qname: str, qtype: str) -> list[RR]:
-            if matches(rname, qname) and matches(rtype, qtype):
+            if name_matcher.matches(qname) and type_matcher.matches(qtype):
                 return self.resolve_upstream(upstream, qname, qtype)
             return []
 
@@ -1,17 +1,21 @@
 #  Copyright (c) Kuba Szczodrzyński 2023-9-11.
 
+from .body import RequestBody
 from .decorator import get, post, request
 from .events import HttpRequestEvent, HttpResponseEvent
-from .module import HttpModule
-from .types import Request, Response
+from .module import HttpEngine, HttpModule
+from .types import Request, Response, Stream
 
 __all__ = [
     "HttpModule",
+    "HttpEngine",
     "request",
     "get",
     "post",
     "Request",
+    "RequestBody",
     "Response",
+    "Stream",
     "HttpRequestEvent",
     "HttpResponseEvent",
 ]
@@ -0,0 +1,88 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+import json
+from pathlib import Path
+from typing import Any, AsyncGenerator, Awaitable, Callable
+from urllib.parse import parse_qs
+
+CHUNK_SIZE = 64 * 1024
+
+
+class RequestBody:
+    # a request body, read from the connection only when (and if)
+    # the handler asks for it
+
+    def __init__(
+        self,
+        read: Callable[[int], Awaitable[bytes]],
+        length: int,
+        content_type: str,
+    ):
+        # 'read' - up to N next bytes of the body, from any loop
+        if length < 0:
+            raise ValueError(f"Invalid body length: {length}")
+        self.length = length
+        self.content_type = content_type
+        self.remaining = length
+        self._read = read
+        self._data: bytes | None = None
+
+    def __getstate__(self) -> dict:
+        # for the journal - the reader is bound to the connection,
+        # so only what was already read is kept
+        state = dict(self.__dict__)
+        state["_read"] = None
+        return state
+
+    def __repr__(self) -> str:
+        return f"RequestBody({self.content_type or '-'}, {self.length} bytes)"
+
+    async def chunks(self, size: int = CHUNK_SIZE) -> AsyncGenerator[bytes, None]:
+        # the rest of the body, as it arrives - without keeping it in memory
+        if self._data is not None:
+            yield self._data
+            return
+        if self._read is None and self.remaining:
+            raise RuntimeError("Request body not available (unpickled)")
+        while self.remaining:
+            chunk = await self._read(min(size, self.remaining))
+            if not chunk:
+                raise ConnectionError("Connection closed while reading body")
+            self.remaining -= len(chunk)
+            yield chunk
+
+    async def read(self) -> bytes:
+        # the whole body - kept for handlers that need it again
+        if self._data is None:
+            if self.remaining != self.length:
+                raise RuntimeError("Request body already partially consumed")
+            self._data = b"".join([chunk async for chunk in self.chunks()])
+        return self._data
+
+    async def save(self, path: Path) -> int:
+        with path.open("wb") as f:
+            async for chunk in self.chunks():
+                f.write(chunk)
+        return self.length
+
+    async def text(self) -> str:
+        return (await self.read()).decode("utf-8")
+
+    async def json(self) -> Any:
+        return json.loads(await self.text())
+
+    async def form(self) -> dict[str, str]:
+        form = parse_qs(await self.text(), keep_blank_values=True)
+        return {k.lower(): v[0] for k, v in form.items()}
+
+    async def decode(self) -> str | bytes | dict:
+        # by the content type, falling back to bytes if it's not UTF-8
+        match self.content_type.partition(";")[0]:
+            case "application/json":
+                return await self.json()
+            case "application/x-www-form-urlencoded":
+                return await self.form()
+        try:
+            return await self.text()
+        except UnicodeDecodeError:
+            return await self.read()
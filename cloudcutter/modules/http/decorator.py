@@ -10,8 +10,9 @@ def request(
     host: str = None,
     query: dict = None,
     headers: dict = None,
+    max_body_size: int = None,
 ):
-    model = Request(method, path, host, query, headers)
+    model = Request(method, path, host, query, headers, max_body_size=max_body_size)
 
     def attach(func: RequestHandler) -> RequestHandler:
         if not hasattr(func, "__requests__"):
@@ -23,9 +24,37 @@ def request(
     return attach
 
 
-def get(path: str, *, host: str = None, query: dict = None, headers: dict = None):
-    return request("GET", path, host=host, query=query, headers=headers)
+def get(
+    path: str,
+    *,
+    host: str = None,
+    query: dict = None,
+    headers: dict = None,
+    max_body_size: int = None,
+):
+    return request(
+        "GET",
+        path,
+        host=host,
+        query=query,
+        headers=headers,
+        max_body_size=max_body_size,
+    )
 
 
-def post(path: str, *, host: str = None, query: dict = None, headers: dict = None):
-    return request("POST", path, host=host, query=query, headers=headers)
+def post(
+    path: str,
+    *,
+    host: str = None,
+    query: dict = None,
+    headers: dict = None,
+    max_body_size: int = None,
+):
+    return request(
+        "POST",
+        path,
+        host=host,
+        query=query,
+        headers=headers,
+        max_body_size=max_body_size,
+    )
@@ -2,17 +2,23 @@
 
 from dataclasses import dataclass
 
-from cloudcutter.modules.base import BaseEvent
+from cloudcutter.modules.base import BaseEvent, Batch, Overflow
 
 from .types import Request, Response
 
 
 @dataclass
 class HttpRequestEvent(BaseEvent):
+    __policy__ = Batch(window=0.1, size=100)
+    __overflow__ = Overflow.DROP_OLDEST
+
     request: Request
 
 
 @dataclass
 class HttpResponseEvent(BaseEvent):
+    __policy__ = Batch(window=0.1, size=100)
+    __overflow__ = Overflow.DROP_OLDEST
+
     request: Request
     response: Response
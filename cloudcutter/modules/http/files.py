@@ -0,0 +1,76 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+import os
+import re
+from email.utils import formatdate
+from http import HTTPStatus
+
+from .types import Request
+
+# a single range - multiple ranges are answered with the whole file
+RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def file_etag(stat: os.stat_result) -> str:
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range(value: str, size: int) -> tuple[int, int] | None:
+    # (offset, count) of the range - None if it can't be satisfied;
+    # raises ValueError if the header isn't a single valid range
+    match = RANGE.fullmatch(value.replace(" ", ""))
+    if not match or match.groups() == ("", ""):
+        raise ValueError(f"Unsupported range: {value}")
+    first, last = match.groups()
+    if not first:
+        # suffix range - the last N bytes
+        count = min(int(last), size)
+        return (size - count, count) if count else None
+    first = int(first)
+    if last and int(last) < first:
+        raise ValueError(f"Invalid range: {value}")
+    if first >= size:
+        return None
+    last = min(int(last), size - 1) if last else size - 1
+    return first, last - first + 1
+
+
+def file_response(
+    request: Request,
+    stat: os.stat_result,
+) -> tuple[int, dict[str, str], tuple[int, int] | None]:
+    # status, headers and (offset, count) of the file part to send
+    size = stat.st_size
+    etag = file_etag(stat)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Accept-Ranges": "bytes",
+    }
+    request_headers = request.headers or {}
+
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in tags or etag in tags:
+            return HTTPStatus.NOT_MODIFIED, headers, None
+
+    range_header = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+    if if_range is not None and if_range not in (etag, headers["Last-Modified"]):
+        # the file has changed - send all of it
+        range_header = None
+    if range_header is None:
+        return HTTPStatus.OK, headers, (0, size)
+
+    try:
+        part = parse_range(range_header, size)
+    except ValueError:
+        # not understood (or multiple ranges) - ignore the header
+        return HTTPStatus.OK, headers, (0, size)
+    if part is None:
+        headers["Content-Range"] = f"bytes */{size}"
+        return HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, headers, None
+    offset, count = part
+    headers["Content-Range"] = f"bytes {offset}-{offset + count - 1}/{size}"
+    return HTTPStatus.PARTIAL_CONTENT, headers, part
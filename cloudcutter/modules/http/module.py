@@ -2,33 +2,55 @@
 
 import asyncio
 import json
+import os
 import re
 import socketserver
-from asyncio import Future
+from asyncio import AbstractEventLoop, Future
+from contextlib import suppress
+from dataclasses import replace
+from email.message import Message
+from enum import Enum
 from functools import partial
 from http import HTTPStatus
 from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from ipaddress import IPv4Address
 from pathlib import Path
-from ssl import PROTOCOL_TLS, SSLContext, SSLSocket
+from socket import SHUT_RD, socket
+from ssl import PROTOCOL_TLS, SSLContext, SSLObject, SSLSocket
 from threading import Thread
-from typing import Any, Callable
+from typing import TYPE_CHECKING, Any, Callable, Generator
 from urllib.parse import parse_qs, urlparse
 
 # noinspection PyProtectedMember
 from sslpsk3.sslpsk3 import _ssl_set_psk_server_callback
 
-from cloudcutter.modules.base import ModuleBase
-from cloudcutter.utils import matches
+from cloudcutter.modules.base import RUNTIME, ModuleBase
+from cloudcutter.utils import Matcher
 
+from .body import CHUNK_SIZE, RequestBody
 from .events import HttpRequestEvent, HttpResponseEvent
-from .types import Request, RequestHandler
+from .files import file_response
+from .routes import RouteTable
+from .runner import HandlerRunner
+from .types import Request, RequestHandler, Response, Stream
+
+if TYPE_CHECKING:
+    from .server import HttpServer
 
 SSLCertType = tuple[str, str] | Callable[[str], tuple[str, str]]
 SSLPSKType = bytes | Callable[[bytes], bytes]
 
 
+class HttpEngine(Enum):
+    # ThreadingHTTPServer - a thread for every connection
+    THREADING = "threading"
+    # asyncio streams - all connections on a single loop
+    ASYNCIO = "asyncio"
+
+
 class HttpModule(ModuleBase):
+    # binds to the interface address
+    requires = ("ipconfig",)
     # pre-run configuration
     _address: IPv4Address = None
     _http_port: int = None
@@ -36,19 +58,33 @@ class HttpModule(ModuleBase):
     _https_protocol: int = None
     _https_ciphers: str = None
     _https_psk_hint: bytes = None
+    _engine: HttpEngine = HttpEngine.THREADING
+    _keep_alive_timeout: float = 15.0
+    _keep_alive_requests: int = 100
+    _handler_timeout: float = 30.0
+    _max_body_size: int = 1024 * 1024
     # runtime configuration
     handlers: list[tuple[Request, RequestHandler]] = None
-    ssl_cert_db: list[tuple[str, SSLCertType]] = None
-    ssl_psk_db: list[tuple[bytes, SSLPSKType]] = None
+    _routes: RouteTable = None
+    runner: HandlerRunner = None
+    ssl_cert_db: list[tuple[Matcher[str], SSLCertType]] = None
+    ssl_psk_db: list[tuple[Matcher[bytes], SSLPSKType]] = None
     # server handle
     _http_thread: Thread | None = None
     _https_thread: Thread | None = None
     _http: ThreadingHTTPServer | None = None
     _https: ThreadingHTTPServer | None = None
+    _connections: set[socket] = None
+    _server: "HttpServer" = None
+    _server_loop: AbstractEventLoop | None = None
+    _server_thread: Thread | None = None
 
     def __init__(self):
         super().__init__()
         self.handlers = []
+        self._connections = set()
+        self._routes = RouteTable(self.handlers)
+        self.runner = HandlerRunner()
         self.ssl_cert_db = []
         self.ssl_psk_db = []
 
@@ -60,8 +96,17 @@ class HttpModule(ModuleBase):
         https_protocol: int = PROTOCOL_TLS,
         https_ciphers: str = "ALL:!ADH:!LOW:!EXP:!MD5:@STRENGTH",
         https_psk_hint: bytes = None,
+        engine: HttpEngine | str = HttpEngine.THREADING,
+        keep_alive_timeout: float = 15.0,
+        keep_alive_requests: int = 100,
+        handler_timeout: float = 30.0,
+        max_body_size: int = 1024 * 1024,
     ) -> None:
-        if self._http is not None or self._https is not None:
+        # keep_alive_timeout - idle time before closing a connection (0 - disable)
+        # keep_alive_requests - requests served over a single connection
+        # handler_timeout - time limit of a single request handler
+        # max_body_size - request body limit of handlers that don't set one
+        if self._http or self._https or self._server:
             raise RuntimeError("Server already running, stop to reconfigure")
         self._address = address
         self._http_port = http
@@ -69,6 +114,11 @@ class HttpModule(ModuleBase):
         self._https_protocol = https_protocol
         self._https_ciphers = https_ciphers
         self._https_psk_hint = https_psk_hint
+        self._engine = HttpEngine(engine)
+        self._keep_alive_timeout = keep_alive_timeout
+        self._keep_alive_requests = keep_alive_requests
+        self._handler_timeout = handler_timeout
+        self._max_body_size = max_body_size
 
     async def start(self) -> None:
         if not self._address:
@@ -76,7 +126,11 @@ class HttpModule(ModuleBase):
 
         for request, func in self.handlers:
             name = re.match(r".+?function ([\w_.]+)", str(func)).group(1)
-            self.debug(f"Found handler '{name}' for {request.format()}")
+            self.debug("Found handler '%s' for %s", name, request.format())
+
+        if self._engine == HttpEngine.ASYNCIO:
+            await self.server_start()
+            return
 
         http_future = self.make_future()
         self._http_thread = Thread(
@@ -97,6 +151,8 @@ class HttpModule(ModuleBase):
         await asyncio.gather(http_future, https_future)
 
     async def stop(self) -> None:
+        if self._server:
+            await self.server_stop()
         if self._http:
             self._http.shutdown()
             self._http_thread.join()
@@ -105,6 +161,14 @@ class HttpModule(ModuleBase):
             self._https.shutdown()
             self._https_thread.join()
             self._https = self._https_thread = None
+        # shutdown() only stops accepting - end kept-alive connections too;
+        # reading only, so that responses in progress still go out
+        connections, self._connections = self._connections, set()
+        for sock in list(connections):
+            with suppress(OSError):
+                # not SSLSocket.shutdown(), which drops the TLS session
+                socket.shutdown(sock, SHUT_RD)
+        self.runner.close()
 
     def http_entrypoint(self, future: Future) -> None:
         self.resolve_future(future)
@@ -126,10 +190,7 @@ class HttpModule(ModuleBase):
             server_address=(str(self._address), self._https_port),
             RequestHandlerClass=partial(HttpRequestHandler, http=self),
         )
-        ctx = SSLContext(protocol=self._https_protocol)
-        ctx.set_ciphers(self._https_ciphers)
-        ctx.sni_callback = self._ssl_sni_callback
-        self._https.socket = ctx.wrap_socket(
+        self._https.socket = self._ssl_context().wrap_socket(
             self._https.socket,
             server_side=True,
             do_handshake_on_connect=False,
@@ -138,21 +199,77 @@ class HttpModule(ModuleBase):
 
         def accept():
             sock, addr = real_accept()
-            _ssl_set_psk_server_callback(
-                sock=sock,
-                psk_cb=lambda identity: self._ssl_psk_callback(identity),
-                hint=self._https_psk_hint,
-            )
+            self._ssl_psk_setup(sock)
             sock.do_handshake()
             return sock, addr
 
         self._https.socket.accept = accept
         self._https.serve_forever()
 
-    def _ssl_sni_callback(self, sock: SSLSocket, sni: str, ctx: SSLContext) -> None:
+    async def server_start(self) -> None:
+        from .server import HttpServer
+
+        self._server = HttpServer(self)
+        if RUNTIME.reactor:
+            # serve on the shared loop
+            await self._server.start()
+            return
+        future = self.make_future()
+        self._server_thread = Thread(
+            target=self.server_entrypoint,
+            args=[future],
+            daemon=True,
+        )
+        self._server_thread.start()
+        await future
+
+    async def server_stop(self) -> None:
+        if self._server_thread:
+            await asyncio.wrap_future(
+                asyncio.run_coroutine_threadsafe(
+                    self._server.close(),
+                    self._server_loop,
+                )
+            )
+            self._server_thread.join()
+        else:
+            await self._server.close()
+        self._server = self._server_loop = self._server_thread = None
+
+    def server_entrypoint(self, future: Future) -> None:
+        loop = self._server_loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self._server.start())
+            self.resolve_future(future)
+            loop.run_until_complete(self._server.wait_closed())
+        except Exception as e:
+            self.reject_future(future, e)
+        finally:
+            loop.close()
+
+    def _ssl_context(self) -> SSLContext:
+        ctx = SSLContext(protocol=self._https_protocol)
+        ctx.set_ciphers(self._https_ciphers)
+        ctx.sni_callback = self._ssl_sni_callback
+        return ctx
+
+    def _ssl_psk_setup(self, sock: SSLSocket | SSLObject) -> None:
+        # must be called before the handshake
+        _ssl_set_psk_server_callback(
+            sock=sock,
+            psk_cb=lambda identity: self._ssl_psk_callback(identity),
+            hint=self._https_psk_hint,
+        )
+
+    def _ssl_sni_callback(
+        self,
+        sock: SSLSocket | SSLObject,
+        sni: str,
+        ctx: SSLContext,
+    ) -> None:
         sni = sni or ""
-        for pattern, value in self.ssl_cert_db:
-            if not matches(pattern, sni):
+        for matcher, value in self.ssl_cert_db:
+            if not matcher.matches(sni):
                 continue
             if callable(value):
                 value = value(sni)
@@ -167,9 +284,9 @@ class HttpModule(ModuleBase):
         self.warning(f"Unknown SNI name '{sni}'")
 
     def _ssl_psk_callback(self, identity: bytes) -> bytes:
-        self.verbose(f"Connection with PSK identity {identity.hex()}")
-        for pattern, psk in self.ssl_psk_db:
-            if not matches(pattern, identity):
+        self.verbose("Connection with PSK identity %s", identity.hex())
+        for matcher, psk in self.ssl_psk_db:
+            if not matcher.matches(identity):
                 continue
             if callable(psk):
                 try:
@@ -182,6 +299,93 @@ class HttpModule(ModuleBase):
         self.warning(f"Unknown PSK identity '{identity.hex()}'")
         return b""  # NoneType is not a valid return value
 
+    def build_request(
+        self,
+        method: str,
+        target: str,
+        headers: Message,
+        body: RequestBody | None,
+        address: IPv4Address,
+    ) -> Request:
+        url = urlparse(target)
+        path = url.path
+        query = parse_qs(url.query, keep_blank_values=True)
+        query = {k.lower(): v[0] for k, v in query.items()}
+        headers = {k.lower(): v for k, v in headers.items()}
+        host = headers.get("host", "")
+        # the body is read (and decoded) by the handler
+        return Request(method, path, host, query, headers, body, address)
+
+    def match_handlers(
+        self,
+        request: Request,
+    ) -> Generator[tuple[Request, RequestHandler], Any, None]:
+        # routes and handlers matching the request, in order of adding;
+        # HEAD is handled by GET handlers, only without the body
+        if request.method == "HEAD":
+            return self._routes.match(replace(request, method="GET"))
+        return self._routes.match(request)
+
+    @staticmethod
+    def content_length(headers: Message) -> int:
+        # digits only - int() would take signs, spaces and underscores,
+        # and a negative length reads until EOF
+        length = headers.get("Content-Length", "0").strip()
+        if not (length.isascii() and length.isdigit()):
+            raise ValueError(f"Invalid Content-Length: {length!r}")
+        return int(length)
+
+    def body_limit(self, route: Request) -> int:
+        if route.max_body_size is None:
+            return self._max_body_size
+        return route.max_body_size
+
+    def keep_alive(self, version: str, connection: str, requests: int) -> bool:
+        # whether the connection stays open after 'requests' responses
+        if not self._keep_alive_timeout or requests >= self._keep_alive_requests:
+            return False
+        tokens = {token.strip() for token in connection.lower().split(",")}
+        if version == "HTTP/1.1":
+            return "close" not in tokens
+        return "keep-alive" in tokens
+
+    def keep_alive_headers(self, keep_alive: bool, requests: int) -> dict[str, str]:
+        if not keep_alive:
+            return {"Connection": "close"}
+        timeout = int(self._keep_alive_timeout)
+        remaining = self._keep_alive_requests - requests
+        return {
+            "Connection": "keep-alive",
+            "Keep-Alive": f"timeout={timeout}, max={remaining}",
+        }
+
+    @staticmethod
+    def chunked(stream: Stream, version: str) -> bool:
+        # HTTP/1.0 clients can't read chunks - a stream of unknown length
+        # is sent until the connection closes instead
+        return stream.length is None and version == "HTTP/1.1"
+
+    @staticmethod
+    def encode_response(
+        response: Response,
+    ) -> tuple[int, str | None, bytes | Path | Stream]:
+        # status code, content type and body of a handler's response
+        if isinstance(response, int):
+            return response, None, b""
+        match response:
+            case Stream():
+                return response.status, response.content_type, response
+            case str():
+                return HTTPStatus.OK, "text/plain", response.encode("utf-8")
+            case bytes():
+                return HTTPStatus.OK, "application/octet-stream", response
+            case Path():
+                return HTTPStatus.OK, "application/octet-stream", response
+            case dict() | list():
+                body = json.dumps(response).encode("utf-8")
+                return HTTPStatus.OK, "application/json", body
+        return HTTPStatus.INTERNAL_SERVER_ERROR, None, b""
+
     def add_handler(
         self,
         func: RequestHandler,
@@ -191,9 +395,19 @@ class HttpModule(ModuleBase):
         host: str = None,
         query: dict = None,
         headers: dict = None,
+        max_body_size: int = None,
     ) -> None:
-        model = Request(method, path, host, query, headers)
+        model = Request(
+            method,
+            path,
+            host,
+            query,
+            headers,
+            max_body_size=max_body_size,
+        )
         self.handlers.append((model, func))
+        self.runner.add(func)
+        self._routes = RouteTable(self.handlers)
 
     def add_handlers(self, obj: object) -> None:
         def scan_type(scan_cls):
@@ -209,20 +423,26 @@ class HttpModule(ModuleBase):
                     continue
                 # decorated function is not bound to instance
                 bound_func = partial(func, obj)
+                # run on the loop of whoever adds the handlers
+                self.runner.add(bound_func)
                 for model in getattr(func, "__requests__"):
                     self.handlers.append((model, bound_func))
+        # compile the routes once, instead of matching them one by one
+        self._routes = RouteTable(self.handlers)
 
     def clear_handlers(self) -> None:
         self.handlers = []
+        self.runner.clear()
+        self._routes = RouteTable(self.handlers)
 
     def add_ssl_cert(self, cert: str, key: str, sni: str = ".*") -> None:
-        self.ssl_cert_db.append((sni, (cert, key)))
+        self.ssl_cert_db.append((Matcher(sni), (cert, key)))
 
     def clear_ssl_certs(self) -> None:
         self.ssl_cert_db = []
 
     def add_ssl_psk(self, psk: SSLPSKType, identity: bytes = b".*") -> None:
-        self.ssl_psk_db.append((identity, psk))
+        self.ssl_psk_db.append((Matcher(identity), psk))
 
     def clear_ssl_psk(self) -> None:
         self.ssl_psk_db = []
@@ -230,6 +450,13 @@ class HttpModule(ModuleBase):
 
 # noinspection PyPep8Naming
 class HttpRequestHandler(BaseHTTPRequestHandler):
+    # allow persistent connections
+    protocol_version = "HTTP/1.1"
+    # requests served over this connection so far
+    requests: int = 0
+    # whether the connection is still usable after the current request
+    keep_alive: bool = True
+
     def __init__(
         self,
         request: bytes,
@@ -244,10 +471,31 @@ class HttpRequestHandler(BaseHTTPRequestHandler):
             # handle request exceptions here
             self.http.exception(f"Request handler raised exception", exc_info=e)
 
+    def setup(self) -> None:
+        # idle timeout of the socket - BaseHTTPRequestHandler closes
+        # the connection if no request comes in time
+        self.timeout = self.http._keep_alive_timeout or None
+        super().setup()
+        self.http._connections.add(self.connection)
+
+    def finish(self) -> None:
+        self.http._connections.discard(self.connection)
+        super().finish()
+
     def log_request(self, code: int | str = ..., size: int | str = ...) -> None:
-        self.http.info(f"{self.address_string()}: {self.command} {self.path} -> {code}")
+        self.http.info(
+            "%s: %s %s -> %s",
+            self.client_address[0],
+            self.command,
+            self.path,
+            code,
+        )
 
     def log_error(self, msg: str, *args: Any) -> None:
+        if msg.startswith("Request timed out"):
+            # idle keep-alive connection
+            self.http.verbose(msg, *args)
+            return
         self.http.error(msg, *args)
 
     def do_GET(self) -> None:
@@ -256,116 +504,178 @@ class HttpRequestHandler(BaseHTTPRequestHandler):
     def do_POST(self) -> None:
         self.do_request()
 
+    def do_HEAD(self) -> None:
+        self.do_request()
+
     def do_request(self) -> None:
+        if self.connection not in self.http._connections:
+            # ended by stop() - a request might still have made it in
+            self.close_connection = True
+            return
+        self.requests += 1
+        self.keep_alive = True
         try:
             self.handle_request()
         except Exception as e:
             self.http.exception(f"Exception in {self.command} {self.path}", exc_info=e)
-            data = str(e)
-            self.send_response(HTTPStatus.INTERNAL_SERVER_ERROR)
-            self.send_header("Connection", "close")
-            self.send_header("Content-Length", str(len(data)))
-            self.end_headers()
-            self.wfile.write(data.encode())
+            data = str(e).encode()
+            self.send_head(HTTPStatus.INTERNAL_SERVER_ERROR, None, len(data), False)
+            self.wfile.write(data)
+
+    def send_head(
+        self,
+        status: int,
+        content_type: str | None,
+        length: int | None,
+        keep_alive: bool = True,
+        headers: dict[str, str] = None,
+    ) -> None:
+        # 'length' - None if not known upfront
+        keep_alive = (
+            keep_alive
+            and self.keep_alive
+            and self.http.keep_alive(
+                self.request_version,
+                self.headers.get("Connection", ""),
+                self.requests,
+            )
+        )
+        self.send_response(status)
+        # sets close_connection, which ends the handle() loop
+        headers = self.http.keep_alive_headers(keep_alive, self.requests) | (
+            headers or {}
+        )
+        for key, value in headers.items():
+            self.send_header(key, value)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        if length is not None and status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Length", str(length))
+        self.end_headers()
 
     def handle_request(self) -> None:
         address = IPv4Address(self.client_address[0])
-        method = self.command
-        url = urlparse(self.path)
-        path = url.path
-        query = parse_qs(url.query, keep_blank_values=True)
-        query = {k.lower(): v[0] for k, v in query.items()}
-        headers = {k.lower(): v for k, v in self.headers.items()}
-        host = headers.get("host", "")
-
-        if length := int(headers.get("content-length", 0)):
-            body = self.rfile.read(length)
-            match headers.get("content-type", "").partition(";")[0]:
-                case "text/plain":
-                    body = body.decode("utf-8")
-                case "application/json":
-                    body = json.loads(body.decode("utf-8"))
-                case "application/x-www-form-urlencoded":
-                    body = parse_qs(body.decode("utf-8"), keep_blank_values=True)
-                    body = {k.lower(): v[0] for k, v in body.items()}
-                case _:
-                    try:
-                        body = body.decode("utf-8")
-                    except UnicodeDecodeError:
-                        pass
-        else:
-            body = None
-
-        request = Request(method, path, host, query, headers, body, address)
+        body = None
+        try:
+            length = self.http.content_length(self.headers)
+        except ValueError:
+            # the request's end is unknown - close the connection
+            self.send_head(HTTPStatus.BAD_REQUEST, None, 0, False)
+            return
+        if length:
+            # read from the handler's loop, while this thread waits for it
+            body = RequestBody(
+                partial(asyncio.to_thread, self.rfile.read),
+                length,
+                self.headers.get("Content-Type", ""),
+            )
+        request = self.http.build_request(
+            self.command,
+            self.path,
+            self.headers,
+            body,
+            address,
+        )
         HttpRequestEvent(request).broadcast()
 
-        for model, func in self.http.handlers:
-            if not matches(model.method, method):
-                continue
-            if not matches(model.path, path):
-                continue
-            if model.host and not matches(model.host, host):
-                continue
-            if model.query:
-                if not all(
-                    k in query and matches(v, query[k]) for k, v in model.query.items()
-                ):
-                    continue
-            if model.headers:
-                if not all(
-                    k in headers and matches(v, headers[k])
-                    for k, v in model.headers.items()
-                ):
-                    continue
+        failed = False
+        for route, func in self.http.match_handlers(request):
+            if body and body.length > self.http.body_limit(route):
+                # the body is never read - close the connection instead
+                self.send_head(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, None, 0, False)
+                return
             # execute the request handler to get a response
             try:
-                coro = func(request)
-                response = asyncio.new_event_loop().run_until_complete(coro)
+                response = self.http.runner.run(
+                    func,
+                    request,
+                    self.http._handler_timeout,
+                )
             except Exception as e:
                 self.http.exception("Request handler raised exception", exc_info=e)
                 response = 500
+                failed = True
             # finish if a response was returned
             if response is not None:
                 break
         else:
-            self.send_response(HTTPStatus.NOT_FOUND)
-            self.send_header("Connection", "close")
-            self.send_header("Content-Length", "0")
-            self.end_headers()
-            return
+            response = None
 
-        HttpResponseEvent(request, response).broadcast()
+        if body and body.remaining:
+            # skip what the handlers didn't read, to get to the next request;
+            # a failed handler might still be reading it, though
+            self.keep_alive = not failed and self.skip_body(body)
 
-        if isinstance(response, int):
-            self.send_response(response)
-            self.send_header("Connection", "close")
-            self.send_header("Content-Length", "0")
-            self.end_headers()
+        if response is None:
+            self.send_head(HTTPStatus.NOT_FOUND, None, 0)
             return
 
-        match response:
-            case str():
-                content_type = "text/plain"
-                body = response.encode("utf-8")
-            case bytes():
-                content_type = "application/octet-stream"
-                body = response
-            case Path():
-                content_type = "application/octet-stream"
-                body = response.read_bytes()
-            case dict() | list():
-                content_type = "application/json"
-                body = json.dumps(response).encode("utf-8")
-            case _:
-                self.send_response(500)
-                self.send_header("Connection", "close")
-                self.send_header("Content-Length", "0")
-                self.end_headers()
-                return
+        HttpResponseEvent(request, response).broadcast()
 
-        self.send_response(HTTPStatus.OK)
-        self.send_header("Connection", "close")
-        self.send_header("Content-Type", content_type)
-        self.send_header("Content-Length", str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
+        status, content_type, body = self.http.encode_response(response)
+        if isinstance(body, Path):
+            self.send_file(request, content_type, body)
+            return
+        if isinstance(body, Stream):
+            self.send_stream(func, status, content_type, body)
+            return
+        self.send_head(status, content_type, len(body))
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def skip_body(self, body: RequestBody) -> bool:
+        while body.remaining:
+            chunk = self.rfile.read(min(body.remaining, CHUNK_SIZE))
+            if not chunk:
+                return False
+            body.remaining -= len(chunk)
+        return True
+
+    def send_file(self, request: Request, content_type: str, path: Path) -> None:
+        with path.open("rb") as f:
+            status, headers, part = file_response(request, os.fstat(f.fileno()))
+            offset, count = part or (0, 0)
+            self.send_head(status, content_type, count, headers=headers)
+            if count and self.command != "HEAD":
+                # os.sendfile() on plain sockets, chunked send() on TLS -
+                # the file is never read into memory as a whole
+                self.connection.sendfile(f, offset, count)
+
+    def send_stream(
+        self,
+        func: RequestHandler,
+        status: int,
+        content_type: str,
+        stream: Stream,
+    ) -> None:
+        chunked = self.http.chunked(stream, self.request_version)
+        headers = {"Transfer-Encoding": "chunked"} if chunked else {}
+        keep_alive = chunked or stream.length is not None
+        self.send_head(status, content_type, stream.length, keep_alive, headers)
+        if self.command == "HEAD":
+            self.http.runner.discard(func, stream.body)
+            return
+        sent = 0
+        try:
+            for chunk in self.http.runner.stream(
+                func,
+                stream.body,
+                self.http._handler_timeout,
+            ):
+                if not chunk:
+                    continue
+                if chunked:
+                    self.wfile.write(b"%x\r\n%b\r\n" % (len(chunk), chunk))
+                else:
+                    self.wfile.write(chunk)
+                sent += len(chunk)
+        except Exception as e:
+            # the headers are already sent - just drop the connection
+            self.http.exception("Response stream raised exception", exc_info=e)
+            self.close_connection = True
+            return
+        if chunked:
+            self.wfile.write(b"0\r\n\r\n")
+        if stream.length is not None and sent != stream.length:
+            self.http.error("Response stream sent %d of %d bytes", sent, stream.length)
+            self.close_connection = True
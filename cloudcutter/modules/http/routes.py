@@ -0,0 +1,147 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+from collections import Counter
+from typing import Any, Callable, Generator
+
+from cloudcutter.utils import Matcher
+
+from .types import Request, RequestHandler
+
+
+class Route:
+    __slots__ = ("order", "model", "func", "patterns")
+
+    def __init__(self, order: int, model: Request, func: RequestHandler):
+        self.order = order
+        self.model = model
+        self.func = func
+        # constraint name -> (value getter, matcher)
+        self.patterns: dict[str, tuple[Callable[[Request], Any], Matcher]] = {
+            "method": (lambda r: r.method, Matcher(model.method)),
+            "path": (lambda r: r.path, Matcher(model.path)),
+        }
+        if model.host:
+            self.patterns["host"] = (lambda r: r.host, Matcher(model.host))
+        for k, v in (model.query or {}).items():
+            self.patterns[f"query.{k}"] = (
+                lambda r, k=k: r.query.get(k),
+                Matcher(v),
+            )
+        for k, v in (model.headers or {}).items():
+            self.patterns[f"headers.{k}"] = (
+                lambda r, k=k: r.headers.get(k),
+                Matcher(v),
+            )
+
+    def literal(self, name: str) -> str | None:
+        # the key to index this route under, if any
+        item = self.patterns.get(name)
+        return item and item[1].literal
+
+    def checks(self, proven: frozenset[str]) -> tuple:
+        return tuple(item for name, item in self.patterns.items() if name not in proven)
+
+
+# constraints of every route that the index has already checked
+Proven = dict[Route, frozenset[str]]
+# the route's model and its handler
+Match = tuple[Request, RequestHandler]
+
+
+class RouteLeaf:
+    __slots__ = ("routes",)
+
+    def __init__(self, routes: list[Route], proven: Proven):
+        # routes in order of adding, with constraints that are left to check
+        self.routes = [
+            (route.model, route.func, route.checks(proven[route])) for route in routes
+        ]
+
+    def match(self, request: Request) -> Generator[Match, Any, None]:
+        for model, func, checks in self.routes:
+            for get_value, matcher in checks:
+                value = get_value(request)
+                if value is None or not matcher.matches(value):
+                    break
+            else:
+                yield model, func
+
+
+class RouteNode:
+    __slots__ = ("get_value", "table", "fallback")
+
+    def __init__(
+        self,
+        routes: list[Route],
+        name: str,
+        done: frozenset[str],
+        proven: Proven,
+    ):
+        self.get_value = next(
+            route.patterns[name][0] for route in routes if name in route.patterns
+        )
+        indexed: dict[str, list[Route]] = {}
+        rest = []
+        for route in routes:
+            key = route.literal(name)
+            if key is None:
+                rest.append(route)
+            else:
+                indexed.setdefault(key, []).append(route)
+        candidates = [route for group in indexed.values() for route in group]
+        # every route that may match a request with this exact value,
+        # which includes other dotted patterns matching the key
+        self.table: dict[str, RouteLeaf | RouteNode] = {}
+        for key in indexed:
+            matched = [
+                route for route in candidates if route.patterns[name][1].matches(key)
+            ]
+            child_proven = dict(proven)
+            for route in matched:
+                child_proven[route] = proven[route] | {name}
+            matched = sorted(matched + rest, key=lambda route: route.order)
+            self.table[key] = build(matched, done | {name}, child_proven)
+        # any other value - check everything, in order
+        self.fallback = RouteLeaf(routes, proven)
+
+    def match(self, request: Request) -> Generator[Match, Any, None]:
+        node = self.table.get(self.get_value(request))
+        if node is None:
+            return self.fallback.match(request)
+        return node.match(request)
+
+
+def build(
+    routes: list[Route],
+    done: frozenset[str],
+    proven: Proven,
+) -> RouteLeaf | RouteNode:
+    # dispatch on method, then path, then the most common query key
+    if len(routes) > 1:
+        for name in ("method", "path"):
+            if name not in done:
+                return RouteNode(routes, name, done, proven)
+        keys = Counter(
+            name
+            for route in routes
+            for name in route.patterns
+            if name.startswith("query.") and name not in done
+        )
+        if keys:
+            name, count = keys.most_common(1)[0]
+            if count > 1:
+                return RouteNode(routes, name, done, proven)
+    return RouteLeaf(routes, proven)
+
+
+class RouteTable:
+    def __init__(self, handlers: list[tuple[Request, RequestHandler]]):
+        routes = [
+            Route(order, model, func) for order, (model, func) in enumerate(handlers)
+        ]
+        proven = {route: frozenset() for route in routes}
+        self.root = build(routes, frozenset(), proven)
+
+    def match(self, request: Request) -> Generator[Match, Any, None]:
+        # all routes matching the request, in order of adding
+        return self.root.match(request)
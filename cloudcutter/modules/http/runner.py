@@ -0,0 +1,232 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+import asyncio
+from asyncio import AbstractEventLoop
+from concurrent.futures import Future
+from contextlib import aclosing
+from threading import Lock, Thread
+from typing import AsyncGenerator, AsyncIterable, AsyncIterator, Generator, Iterable
+
+from .types import Chunk, ChunkProducer, Request, RequestHandler, Response
+
+# chunks of a Stream that has to run on a loop
+AsyncChunks = AsyncIterable[Chunk] | ChunkProducer
+
+
+def _running_loop() -> AbstractEventLoop | None:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def _encode(chunk: Chunk) -> bytes:
+    return chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+
+
+async def _chunks(body: AsyncChunks) -> AsyncGenerator[bytes, None]:
+    if isinstance(body, AsyncIterable):
+        async for chunk in body:
+            yield _encode(chunk)
+        return
+    # a writer callback - write() returns once the previous chunk has been
+    # taken, so the producer never runs more than a chunk ahead of the client
+    queue = asyncio.Queue(1)
+    done = object()
+
+    async def produce() -> None:
+        try:
+            await body(queue.put)
+        finally:
+            await queue.put(done)
+
+    task = asyncio.create_task(produce())
+    try:
+        while (chunk := await queue.get()) is not done:
+            yield _encode(chunk)
+        # raise the producer's exception, if any
+        await task
+    finally:
+        task.cancel()
+
+
+async def _next(chunks: AsyncIterator[bytes], timeout: float) -> bytes | None:
+    # None once all chunks are sent
+    return await asyncio.wait_for(anext(chunks, None), timeout)
+
+
+class HandlerRunner:
+    # runs request handlers on long-lived loops - the loop the handler was
+    # added from (if it's still running), or a loop shared by all handlers
+
+    def __init__(self):
+        self.loops: dict[RequestHandler, AbstractEventLoop] = {}
+        self._lock = Lock()
+        self._loop: AbstractEventLoop | None = None
+        self._thread: Thread | None = None
+
+    def add(self, func: RequestHandler) -> None:
+        if loop := _running_loop():
+            self.loops[func] = loop
+
+    def clear(self) -> None:
+        self.loops = {}
+
+    def close(self) -> None:
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop:
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join()
+            loop.close()
+            self._thread = None
+
+    def run(self, func: RequestHandler, request: Request, timeout: float) -> Response:
+        # from a request thread - wait for the result; the timeout also
+        # applies here, in case the handler's loop stops before running it
+        future = self._submit(func, request, timeout)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    async def run_async(
+        self,
+        func: RequestHandler,
+        request: Request,
+        timeout: float,
+    ) -> Response:
+        # from the server loop - run there, unless the handler has a loop
+        if self._is_local(func):
+            return await self._call(func, request, timeout)
+        return await asyncio.wrap_future(self._submit(func, request, timeout))
+
+    def stream(
+        self,
+        func: RequestHandler,
+        body: Iterable[Chunk] | AsyncChunks,
+        timeout: float,
+    ) -> Generator[bytes, None, None]:
+        # from a request thread - sync iterators run right here, async ones
+        # on the loop that ran the handler, a chunk at a time
+        if isinstance(body, Iterable):
+            for chunk in body:
+                yield _encode(chunk)
+            return
+        loop = self._loop_for(func)
+        chunks = _chunks(body)
+        try:
+            while True:
+                coro = _next(chunks, timeout)
+                future = asyncio.run_coroutine_threadsafe(coro, loop)
+                try:
+                    chunk = future.result(timeout)
+                except TimeoutError:
+                    future.cancel()
+                    raise
+                if chunk is None:
+                    return
+                yield chunk
+        finally:
+            asyncio.run_coroutine_threadsafe(chunks.aclose(), loop)
+
+    async def stream_async(
+        self,
+        func: RequestHandler,
+        body: Iterable[Chunk] | AsyncChunks,
+        timeout: float,
+    ) -> AsyncGenerator[bytes, None]:
+        # from the server loop - sync iterators run in a worker thread,
+        # async ones where the handler ran
+        if isinstance(body, Iterable):
+            loop = asyncio.get_running_loop()
+            iterator = iter(body)
+            while True:
+                chunk = await loop.run_in_executor(None, next, iterator, None)
+                if chunk is None:
+                    return
+                yield _encode(chunk)
+        if self._is_local(func):
+            async with aclosing(_chunks(body)) as chunks:
+                while (chunk := await _next(chunks, timeout)) is not None:
+                    yield chunk
+            return
+        loop = self.loops[func]
+        chunks = _chunks(body)
+        try:
+            while True:
+                coro = _next(chunks, timeout)
+                future = asyncio.run_coroutine_threadsafe(coro, loop)
+                if (chunk := await asyncio.wrap_future(future)) is None:
+                    return
+                yield chunk
+        finally:
+            asyncio.run_coroutine_threadsafe(chunks.aclose(), loop)
+
+    def discard(
+        self, func: RequestHandler, body: Iterable[Chunk] | AsyncChunks
+    ) -> None:
+        # from a request thread - a stream that won't be sent (i.e. for HEAD),
+        # closed to let the generator clean up
+        if isinstance(body, Iterable):
+            if close := getattr(body, "close", None):
+                close()
+        elif aclose := getattr(body, "aclose", None):
+            asyncio.run_coroutine_threadsafe(aclose(), self._loop_for(func))
+
+    async def discard_async(
+        self,
+        func: RequestHandler,
+        body: Iterable[Chunk] | AsyncChunks,
+    ) -> None:
+        # from the server loop - like discard()
+        if isinstance(body, Iterable):
+            if close := getattr(body, "close", None):
+                await asyncio.get_running_loop().run_in_executor(None, close)
+        elif aclose := getattr(body, "aclose", None):
+            if self._is_local(func):
+                await aclose()
+            else:
+                loop = self.loops[func]
+                future = asyncio.run_coroutine_threadsafe(aclose(), loop)
+                await asyncio.wrap_future(future)
+
+    def _is_local(self, func: RequestHandler) -> bool:
+        # whether the handler runs on the current (server) loop
+        loop = self.loops.get(func)
+        if loop is None or not loop.is_running():
+            return True
+        return loop is asyncio.get_running_loop()
+
+    def _loop_for(self, func: RequestHandler) -> AbstractEventLoop:
+        # the handler's loop (while it's running), or the shared one
+        loop = self.loops.get(func)
+        if loop is None or not loop.is_running():
+            loop = self._shared_loop()
+        return loop
+
+    def _submit(
+        self,
+        func: RequestHandler,
+        request: Request,
+        timeout: float,
+    ) -> Future[Response]:
+        coro = self._call(func, request, timeout)
+        return asyncio.run_coroutine_threadsafe(coro, self._loop_for(func))
+
+    @staticmethod
+    async def _call(func: RequestHandler, request: Request, timeout: float) -> Response:
+        return await asyncio.wait_for(func(request), timeout)
+
+    def _shared_loop(self) -> AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = Thread(
+                    target=self._loop.run_forever,
+                    name="HttpHandlers",
+                    daemon=True,
+                )
+                self._thread.start()
+            return self._loop
@@ -0,0 +1,403 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+import asyncio
+import os
+from asyncio import AbstractEventLoop, StreamReader, StreamWriter, Task
+from contextlib import aclosing
+from email.utils import formatdate
+from functools import partial
+from http import HTTPStatus
+from http.client import HTTPException, parse_headers
+from io import BytesIO
+from ipaddress import IPv4Address
+from pathlib import Path
+from ssl import SSLObject
+
+from .body import RequestBody
+from .events import HttpRequestEvent, HttpResponseEvent
+from .files import file_response
+from .module import HttpModule
+from .types import Request, RequestHandler, Stream
+
+# request line and headers
+MAX_HEADER_SIZE = 64 * 1024
+
+
+class PskSSLObject(SSLObject):
+    # asyncio creates the SSL object only when the connection is made -
+    # PSK callbacks have to be set on it right before the first handshake
+    http: HttpModule = None
+    psk_ready: bool = False
+
+    def do_handshake(self) -> None:
+        if not self.psk_ready:
+            self.psk_ready = True
+            self.http._ssl_psk_setup(self)
+        super().do_handshake()
+
+
+class HttpServer:
+    # connections waiting to be accepted, per listening socket
+    backlog: int = 1024
+    # time limit of the TLS handshake, in seconds
+    handshake_timeout: float = 10.0
+
+    def __init__(self, http: HttpModule):
+        self.http = http
+        self.servers: list[asyncio.Server] = []
+        self.closed: asyncio.Event | None = None
+        # live connections - the servers don't close them on their own
+        self.connections: dict[Task, StreamWriter] = {}
+
+    async def start(self) -> None:
+        http = self.http
+        self.closed = asyncio.Event()
+        if http._http_port:
+            http.info(f"Starting HTTP server on {http._address}:{http._http_port}")
+            server = await asyncio.start_server(
+                self.handle_connection,
+                host=str(http._address),
+                port=http._http_port,
+                backlog=self.backlog,
+                limit=MAX_HEADER_SIZE,
+            )
+            self.servers.append(server)
+        if http._https_port:
+            http.info(f"Starting HTTPS server on {http._address}:{http._https_port}")
+            ctx = http._ssl_context()
+            ctx.sslobject_class = type(
+                "PskSSLObject",
+                (PskSSLObject,),
+                dict(http=http),
+            )
+            server = await asyncio.start_server(
+                self.handle_connection,
+                host=str(http._address),
+                port=http._https_port,
+                backlog=self.backlog,
+                limit=MAX_HEADER_SIZE,
+                ssl=ctx,
+                ssl_handshake_timeout=self.handshake_timeout,
+            )
+            self.servers.append(server)
+
+    async def close(self) -> None:
+        for server in self.servers:
+            server.close()
+        connections = self.connections
+        self.connections = {}
+        for writer in connections.values():
+            # ends the reader - idle connections finish right away,
+            # busy ones after the current request
+            writer.close()
+        await asyncio.gather(*connections, return_exceptions=True)
+        for server in self.servers:
+            await server.wait_closed()
+        self.servers = []
+        if self.closed:
+            self.closed.set()
+
+    async def wait_closed(self) -> None:
+        await self.closed.wait()
+
+    async def handle_connection(self, reader: StreamReader, writer: StreamWriter):
+        address = IPv4Address(writer.get_extra_info("peername")[0])
+        timeout = self.http._keep_alive_timeout or None
+        requests = 0
+        task = asyncio.current_task()
+        self.connections[task] = writer
+        try:
+            while True:
+                # pipelined requests simply wait in the reader's buffer
+                try:
+                    head = await asyncio.wait_for(
+                        reader.readuntil(b"\r\n\r\n"),
+                        timeout,
+                    )
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                    # idle for too long, or closed by the client
+                    break
+                requests += 1
+                keep_alive = await self.handle_request(
+                    reader,
+                    writer,
+                    address,
+                    head,
+                    requests,
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except asyncio.LimitOverrunError:
+            self.send_error(writer, address, HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            self.http.exception("Request handler raised exception", exc_info=e)
+        finally:
+            self.connections.pop(task, None)
+            writer.close()
+
+    async def handle_request(
+        self,
+        reader: StreamReader,
+        writer: StreamWriter,
+        address: IPv4Address,
+        head: bytes,
+        requests: int,
+    ) -> bool:
+        line, _, head = head.partition(b"\r\n")
+        try:
+            method, target, version = line.decode("iso-8859-1").split(" ", 2)
+            headers = parse_headers(BytesIO(head))
+            length = self.http.content_length(headers)
+        except (ValueError, HTTPException):
+            self.send_error(writer, address, HTTPStatus.BAD_REQUEST)
+            return False
+        keep_alive = self.http.keep_alive(
+            version,
+            headers.get("Connection", ""),
+            requests,
+        )
+
+        body = None
+        if length:
+            body = RequestBody(
+                partial(self.read_body, reader, asyncio.get_running_loop()),
+                length,
+                headers.get("Content-Type", ""),
+            )
+        request = self.http.build_request(method, target, headers, body, address)
+        HttpRequestEvent(request).broadcast()
+
+        failed = False
+        for route, func in self.http.match_handlers(request):
+            if body and body.length > self.http.body_limit(route):
+                # the body is never read - close the connection instead
+                headers = self.http.keep_alive_headers(False, requests)
+                self.send_response(
+                    writer,
+                    address,
+                    HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                    headers,
+                    b"",
+                    method,
+                    target,
+                )
+                return False
+            # execute the request handler to get a response
+            try:
+                response = await self.http.runner.run_async(
+                    func,
+                    request,
+                    self.http._handler_timeout,
+                )
+            except Exception as e:
+                self.http.exception("Request handler raised exception", exc_info=e)
+                response = 500
+                failed = True
+            # finish if a response was returned
+            if response is not None:
+                break
+        else:
+            response = None
+
+        if body and body.remaining:
+            # skip what the handlers didn't read, to get to the next request;
+            # a failed handler might still be reading it, though
+            keep_alive = keep_alive and not failed and await self.skip_body(body)
+
+        if response is None:
+            headers = self.http.keep_alive_headers(keep_alive, requests)
+            self.send_response(
+                writer,
+                address,
+                HTTPStatus.NOT_FOUND,
+                headers,
+                b"",
+                method,
+                target,
+            )
+            return keep_alive
+
+        HttpResponseEvent(request, response).broadcast()
+
+        status, content_type, body = self.http.encode_response(response)
+        chunked = False
+        if isinstance(body, Stream):
+            chunked = self.http.chunked(body, version)
+            keep_alive = keep_alive and (chunked or body.length is not None)
+        headers = self.http.keep_alive_headers(keep_alive, requests)
+        if content_type:
+            headers["Content-Type"] = content_type
+        if isinstance(body, Stream):
+            if chunked:
+                headers["Transfer-Encoding"] = "chunked"
+            self.send_response(
+                writer,
+                address,
+                status,
+                headers,
+                b"",
+                method,
+                target,
+                length=body.length,
+            )
+            if method == "HEAD":
+                await self.http.runner.discard_async(func, body.body)
+                return keep_alive
+            sent = await self.send_stream(writer, func, body, chunked)
+            return keep_alive and sent
+        if isinstance(body, Path):
+            await self.send_file(writer, address, request, headers, body, target)
+            return keep_alive
+        length = len(body)
+        if method == "HEAD":
+            body = b""
+        self.send_response(
+            writer,
+            address,
+            status,
+            headers,
+            body,
+            method,
+            target,
+            length=length,
+        )
+        return keep_alive
+
+    @staticmethod
+    async def read_body(
+        reader: StreamReader,
+        loop: AbstractEventLoop,
+        size: int,
+    ) -> bytes:
+        # the reader belongs to the server loop - handlers may run elsewhere
+        if asyncio.get_running_loop() is loop:
+            return await reader.read(size)
+        future = asyncio.run_coroutine_threadsafe(reader.read(size), loop)
+        return await asyncio.wrap_future(future)
+
+    @staticmethod
+    async def skip_body(body: RequestBody) -> bool:
+        try:
+            async for _ in body.chunks():
+                pass
+        except ConnectionError:
+            return False
+        return True
+
+    async def send_file(
+        self,
+        writer: StreamWriter,
+        address: IPv4Address,
+        request: Request,
+        headers: dict[str, str],
+        path: Path,
+        target: str,
+    ) -> None:
+        with path.open("rb") as f:
+            status, file_headers, part = file_response(request, os.fstat(f.fileno()))
+            offset, count = part or (0, 0)
+            self.send_response(
+                writer,
+                address,
+                status,
+                headers | file_headers,
+                b"",
+                request.method,
+                target,
+                length=count,
+            )
+            if not count or request.method == "HEAD":
+                return
+            await writer.drain()
+            # os.sendfile() on plain transports, a chunked fallback on TLS -
+            # the file is never read into memory as a whole
+            await asyncio.get_running_loop().sendfile(
+                writer.transport,
+                f,
+                offset,
+                count,
+            )
+
+    async def send_stream(
+        self,
+        writer: StreamWriter,
+        func: RequestHandler,
+        stream: Stream,
+        chunked: bool,
+    ) -> bool:
+        # whether the whole stream was sent
+        sent = 0
+        try:
+            async with aclosing(
+                self.http.runner.stream_async(
+                    func,
+                    stream.body,
+                    self.http._handler_timeout,
+                )
+            ) as chunks:
+                async for chunk in chunks:
+                    if not chunk:
+                        continue
+                    if chunked:
+                        writer.writelines([b"%x\r\n" % len(chunk), chunk, b"\r\n"])
+                    else:
+                        writer.write(chunk)
+                    sent += len(chunk)
+                    # wait until the client takes it, before producing more
+                    await writer.drain()
+        except Exception as e:
+            # the headers are already sent - just drop the connection
+            self.http.exception("Response stream raised exception", exc_info=e)
+            return False
+        if chunked:
+            writer.write(b"0\r\n\r\n")
+        if stream.length is not None and sent != stream.length:
+            self.http.error("Response stream sent %d of %d bytes", sent, stream.length)
+            return False
+        return True
+
+    def send_response(
+        self,
+        writer: StreamWriter,
+        address: IPv4Address,
+        status: int,
+        headers: dict[str, str],
+        body: bytes,
+        method: str = "-",
+        target: str = "-",
+        length: int | None = ...,
+    ) -> None:
+        # 'length' - if the body is sent separately (None if not known)
+        if length is ...:
+            length = len(body)
+        status = int(status)
+        self.http.info("%s: %s %s -> %s", address, method, target, status)
+        try:
+            phrase = HTTPStatus(status).phrase
+        except ValueError:
+            phrase = ""
+        lines = [
+            f"HTTP/1.1 {status} {phrase}",
+            "Server: Cloudcutter",
+            f"Date: {formatdate(usegmt=True)}",
+            *(f"{k}: {v}" for k, v in headers.items()),
+        ]
+        if length is not None and status != HTTPStatus.NOT_MODIFIED:
+            lines.append(f"Content-Length: {length}")
+        lines += ["", ""]
+        writer.write("\r\n".join(lines).encode("iso-8859-1") + body)
+
+    def send_error(
+        self,
+        writer: StreamWriter,
+        address: IPv4Address,
+        status: HTTPStatus,
+        method: str = "-",
+        target: str = "-",
+    ) -> None:
+        # the connection is closed afterwards
+        headers = self.http.keep_alive_headers(False, 0)
+        self.send_response(writer, address, status, headers, b"", method, target)
@@ -1,12 +1,37 @@
 #  Copyright (c) Kuba Szczodrzyński 2023-9-11.
 
 from dataclasses import dataclass
+from http import HTTPStatus
 from ipaddress import IPv4Address
 from pathlib import Path
-from typing import Awaitable, Callable
+from typing import AsyncIterable, Awaitable, Callable, Iterable
+
+from .body import RequestBody
 
 HttpBody = str | bytes | dict | Path
-Response = HttpBody | int | None
+
+Chunk = bytes | str
+# sends a chunk - returns once the client is ready for more
+ChunkWriter = Callable[[Chunk], Awaitable[None]]
+ChunkProducer = Callable[[ChunkWriter], Awaitable[None]]
+
+
+@dataclass
+class Stream:
+    # a response sent while it's being produced - chunked, unless
+    # the length is known upfront; str chunks are encoded as UTF-8
+    body: Iterable[Chunk] | AsyncIterable[Chunk] | ChunkProducer
+    content_type: str = "application/octet-stream"
+    length: int | None = None
+    status: int = HTTPStatus.OK
+
+    def __post_init__(self) -> None:
+        if isinstance(self.body, (bytes, str)):
+            # a single chunk - not an iterable of bytes/characters
+            self.body = (self.body,)
+
+
+Response = HttpBody | Stream | int | None
 
 
 @dataclass
@@ -16,8 +41,10 @@ class Request:
     host: str | None
     query: dict | None
     headers: dict | None
-    body: HttpBody | None = None
+    body: RequestBody | None = None
     address: IPv4Address | None = None
+    # of a handler's route only (None - HttpModule's default)
+    max_body_size: int | None = None
 
     def __post_init__(self) -> None:
         if self.method.upper() != self.method:
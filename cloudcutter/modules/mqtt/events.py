@@ -5,11 +5,14 @@ from ipaddress import IPv4Address
 
 from amqtt.session import ApplicationMessage
 
-from cloudcutter.modules.base import BaseEvent
+from cloudcutter.modules.base import BaseEvent, Batch, Overflow
 
 
 @dataclass
 class MqttMessageEvent(BaseEvent):
+    __policy__ = Batch(window=0.1, size=100)
+    __overflow__ = Overflow.DROP_OLDEST
+
     message: ApplicationMessage
 
 
@@ -14,7 +14,7 @@ from amqtt.mqtt.constants import QOS_0
 from amqtt.mqtt.protocol.broker_handler import BrokerProtocolHandler
 from amqtt.session import ApplicationMessage
 
-from cloudcutter.modules.base import ModuleBase
+from cloudcutter.modules.base import RUNTIME, ModuleBase
 
 from .events import (
     MqttClientConnectedEvent,
@@ -27,6 +27,8 @@ from .types import MessageHandler
 
 
 class MqttModule(ModuleBase):
+    # binds to the interface address
+    requires = ("ipconfig",)
     # pre-run configuration
     _address: IPv4Address = None
     _mqtt_port: int = None
@@ -67,14 +69,18 @@ class MqttModule(ModuleBase):
             logger = logging.getLogger(name)
             logger.level = logging.WARNING
 
-        broker_future = self.make_future()
-        self._broker_thread = Thread(
-            target=self.broker_entrypoint,
-            args=[broker_future],
-            daemon=True,
-        )
-        self._broker_thread.start()
-        await broker_future
+        if RUNTIME.reactor:
+            # run the broker on the shared loop
+            await self.broker_start()
+        else:
+            broker_future = self.make_future()
+            self._broker_thread = Thread(
+                target=self.broker_entrypoint,
+                args=[broker_future],
+                daemon=True,
+            )
+            self._broker_thread.start()
+            await broker_future
 
         await super().start()
 
@@ -82,9 +88,16 @@ class MqttModule(ModuleBase):
         self.resolve_future(future)
         if not self._mqtt_port:
             return
-        self.info(f"Starting MQTT broker on {self._address}:{self._mqtt_port}")
         self._broker_loop = asyncio.new_event_loop()
         asyncio.set_event_loop(self._broker_loop)
+        self._broker_loop.run_until_complete(self.broker_start())
+        self._broker_loop.run_forever()
+
+    async def broker_start(self) -> None:
+        if not self._mqtt_port:
+            return
+        self.info(f"Starting MQTT broker on {self._address}:{self._mqtt_port}")
+        self._broker_loop = asyncio.get_running_loop()
 
         config = {
             "listeners": {
@@ -107,8 +120,7 @@ class MqttModule(ModuleBase):
         self._broker = Broker(config)
         self._broker.logger.handle = self.broker_logger_handle
         self._broker.logger.setLevel(DEBUG)
-        self._broker_loop.run_until_complete(self._broker.start())
-        self._broker_loop.run_forever()
+        await self._broker.start()
 
     async def run(self) -> None:
         if not self._mqtt_port:
@@ -122,6 +134,9 @@ class MqttModule(ModuleBase):
         self.info(f"Subscribing to {', '.join(topics)}")
         await self._client.subscribe([(topic, QOS_0) for topic in topics])
 
+        # serve module calls on this loop, in between delivered messages
+        await self.event_loop_start()
+
         while self.should_run and self._client is not None:
             message: ApplicationMessage = await self._client.deliver_message()
             if not self._broker:
@@ -131,13 +146,28 @@ class MqttModule(ModuleBase):
                 if not self._broker.matches(message.topic, topic):
                     continue
                 MqttMessageEvent(message).broadcast()
-                try:
-                    await func(message.topic, bytes(message.data))
-                except Exception as e:
-                    self.exception("Message handler raised exception", exc_info=e)
+                handler = self.call_handler(func, message)
+                if self.dispatch_limit <= 1:
+                    await handler
+                else:
+                    # keep the order of messages on the same topic
+                    await self.dispatcher.submit(message.topic, handler)
+
+    async def call_handler(
+        self,
+        func: MessageHandler,
+        message: ApplicationMessage,
+    ) -> None:
+        try:
+            await func(message.topic, bytes(message.data))
+        except Exception as e:
+            self.exception("Message handler raised exception", exc_info=e)
 
     async def stop(self) -> None:
         await super().stop()
+        if self._broker and not self._broker_thread:
+            await self._broker.shutdown()
+            self._broker = None
         if self._broker:
             self._broker_loop.stop()
             self._broker_thread.join()
@@ -1,10 +1,8 @@
 #  Copyright (c) Kuba Szczodrzyński 2023-9-9.
 
-import asyncio
-
 from win32wifi import Win32Wifi
 
-from cloudcutter.modules.base import module_thread
+from cloudcutter.modules.base import SCHEDULER, Backoff, module_thread
 from cloudcutter.types import Ip4Config, NetworkInterface
 from cloudcutter.utils.windows import iphlpapi, wlanapi
 
@@ -55,7 +53,7 @@ class NetworkWindows(NetworkCommon):
 
         if not ipconfig:
             self.info(f"Enabling DHCP address on '{interface.title}'")
-            self.command(
+            await self.command(
                 "netsh",
                 "interface",
                 "ipv4",
@@ -68,30 +66,40 @@ class NetworkWindows(NetworkCommon):
             return
 
         self.info(f"Setting static IP {ipconfig.address} on '{interface.title}'")
-        self.command(
+        show_addresses = (
             "netsh",
             "interface",
             "ipv4",
-            "set",
-            "address",
+            "show",
+            "addresses",
             f"name={index}",
-            "source=static",
-            f"address={ipconfig.address}",
-            f"mask={ipconfig.netmask}",
-            f"gateway={ipconfig.gateway}".lower(),
-            "store=active",
         )
-
-        while True:
-            netsh = self.command(
+        # set the address and check it right away, in one invocation
+        _, show = await self.command_batch(
+            (
                 "netsh",
                 "interface",
                 "ipv4",
-                "show",
-                "addresses",
+                "set",
+                "address",
                 f"name={index}",
-            )
-            if str(ipconfig.address).encode() in netsh:
-                break
-            self.debug("Waiting for IP configuration to apply")
-            await asyncio.sleep(0.5)
+                "source=static",
+                f"address={ipconfig.address}",
+                f"mask={ipconfig.netmask}",
+                f"gateway={ipconfig.gateway}".lower(),
+                "store=active",
+            ),
+            show_addresses,
+        )
+        address = str(ipconfig.address).encode()
+        if address in show.stdout:
+            return
+
+        async def is_applied() -> bool:
+            return address in await self.command(*show_addresses)
+
+        self.debug("Waiting for IP configuration to apply")
+        await SCHEDULER.wait_until(
+            is_applied,
+            backoff=Backoff(initial=0.25, factor=1.5, maximum=2.0, jitter=0.1),
+        )
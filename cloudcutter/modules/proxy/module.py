@@ -260,7 +260,7 @@ class ProxyHandler(BaseRequestHandler):
                         break
                     if not data:
                         break
-                    self.proxy.info(f"{rname} -> {wname}: {len(data)} bytes")
+                    self.proxy.info("%s -> %s: %d bytes", rname, wname, len(data))
                     # for line in hexdump(data, "generator"):
                     #     self.proxy.info(line)
                     try:
@@ -6,7 +6,7 @@ from enum import Enum, auto
 from socket import socket
 from typing import IO
 
-from cloudcutter.utils import matches
+from cloudcutter.utils import Matcher
 
 
 class SocketIO(IO[bytes], ABC):
@@ -72,13 +72,15 @@ class ProxySource:
         if not self.port and ":" in self.host:
             self.host, _, self.port = self.host.rpartition(":")
             self.port = int(self.port)
+        # not a field - regex parts are compiled on first use only
+        self.matcher: Matcher[str] = Matcher(self.host)
 
     def matches(self, other: "ProxySource") -> bool:
         if self.port != 0 and self.port != other.port:
             return False
         if self.protocol != ProxyProtocol.ANY and self.protocol != other.protocol:
             return False
-        return bool(matches(self.host, other.host))
+        return self.matcher.matches(other.host)
 
 
 @dataclass
@@ -41,9 +41,13 @@ class WifiAPStoppedEvent(BaseEvent):
 
 @dataclass
 class WifiAPClientConnectedEvent(BaseEvent):
+    __ordering__ = "client"
+
     client: MAC
 
 
 @dataclass
 class WifiAPClientDisconnectedEvent(BaseEvent):
+    __ordering__ = "client"
+
     client: MAC
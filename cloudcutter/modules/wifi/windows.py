@@ -1,6 +1,5 @@
 #  Copyright (c) Kuba Szczodrzyński 2023-9-9.
 
-import asyncio
 from ctypes.wintypes import LPCWSTR
 
 from macaddress import MAC
@@ -16,7 +15,7 @@ from win32wifi.Win32Wifi import (
     WlanEvent,
 )
 
-from cloudcutter.modules.base import module_thread
+from cloudcutter.modules.base import SCHEDULER, module_thread
 from cloudcutter.types import NetworkInterface, WifiNetwork
 from cloudcutter.utils.dpapi import Dpapi
 from cloudcutter.utils.windows import wlanapi, wlanhosted, wlanmisc
@@ -71,31 +70,31 @@ class WifiWindows(WifiCommon):
 
     async def start(self) -> None:
         await super().start()
-        self._register()
+        await self._register()
         if self.dpapi is None:
             self.dpapi = Dpapi()
             self.dpapi.load_credentials()
         self.ap_clients = set()
 
     async def stop(self) -> None:
-        self._unregister()
+        await self._unregister()
         await super().stop()
 
-    def _register(self):
+    async def _register(self):
         try:
-            self.command("net", "start", "Wlansvc")
+            await self.command("net", "start", "Wlansvc")
             self.info("Started Wlansvc")
         except RuntimeError:
             pass
         if self.notification is None:
             self.notification = Win32Wifi.registerNotification(self.on_notification)
 
-    def _unregister(self, stop_wlansvc: bool = False) -> None:
+    async def _unregister(self, stop_wlansvc: bool = False) -> None:
         if self.notification is not None:
             Win32Wifi.unregisterNotification(self.notification)
             self.notification = None
         if stop_wlansvc:
-            self.command("net", "stop", "Wlansvc")
+            await self.command("net", "stop", "Wlansvc")
             self.info("Stopped Wlansvc")
 
     def on_notification(self, event: WlanEvent) -> None:
@@ -271,8 +270,8 @@ class WifiWindows(WifiCommon):
 
         if config_changed:
             await self.stop_access_point(interface)
-            self._unregister(stop_wlansvc=True)
-            await asyncio.sleep(2)
+            await self._unregister(stop_wlansvc=True)
+            await SCHEDULER.sleep(2)
 
             self.debug("Writing Hosted Network settings")
             wlanhosted.write_settings(new_settings)
@@ -280,7 +279,7 @@ class WifiWindows(WifiCommon):
             self.debug("Writing Hosted Network security settings")
             wlanhosted.write_security(self.dpapi, new_security)
 
-            self._register()
+            await self._register()
             await WifiRawEvent(
                 code="wlan_notification_acm_interface_arrival",
                 data=None,
@@ -289,7 +288,7 @@ class WifiWindows(WifiCommon):
         if not await self.get_access_point_state(interface):
             self.info(f"Starting Hosted Network '{network.ssid}'")
             future = WifiAPStartedEvent.any()
-            self.command("netsh", "wlan", "start", "hostednetwork")
+            await self.command("netsh", "wlan", "start", "hostednetwork")
             await future
         else:
             self.info(f"Hosted Network '{network.ssid}' is already running")
@@ -306,7 +305,7 @@ class WifiWindows(WifiCommon):
         if await self.get_access_point_state(interface):
             self.info("Stopping Hosted Network")
             future = WifiAPStoppedEvent.any()
-            self.command("netsh", "wlan", "stop", "hostednetwork")
+            await self.command("netsh", "wlan", "stop", "hostednetwork")
             await future
 
     @module_thread
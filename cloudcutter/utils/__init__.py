@@ -1,7 +1,9 @@
 #  Copyright (c) Kuba Szczodrzyński 2023-9-9.
 
+from .matcher import Matcher
 from .utils import matches
 
 __all__ = [
+    "Matcher",
     "matches",
 ]
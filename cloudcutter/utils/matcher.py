@@ -0,0 +1,87 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+import re
+from typing import AnyStr, Generic, Pattern
+
+# characters that make a pattern more than a (dotted) literal
+METACHARS = set("^$*+?{}[]|()")
+
+
+def literal_text(pattern: str) -> str | None:
+    # the only string a pattern matches - assuming '.' matches just itself;
+    # None if it's not a literal
+    text = []
+    escaped = False
+    for char in pattern:
+        if escaped:
+            if char.isalnum():
+                # a character class, like \d
+                return None
+            text.append(char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char in METACHARS:
+            return None
+        else:
+            text.append(char)
+    if escaped:
+        return None
+    return "".join(text)
+
+
+class Matcher(Generic[AnyStr]):
+    # a pattern for re.fullmatch(), compiled once - with fast paths
+    # for literals and '.*'
+    __slots__ = ("pattern", "literal", "matches", "_regex")
+
+    def __init__(self, pattern: AnyStr):
+        self.pattern = pattern
+        self._regex = None
+        if isinstance(pattern, bytes):
+            text = pattern.decode("latin-1")
+            literal = literal_text(text)
+            self.literal = literal.encode("latin-1") if literal is not None else None
+        else:
+            text = pattern
+            literal = self.literal = literal_text(text)
+
+        if text == ".*":
+            self.matches = self._matches_any
+        elif literal is None:
+            self.matches = self._matches_regex
+        elif literal == text and "." not in text:
+            # no escapes, no dots - just compare
+            self.matches = self._matches_literal
+        else:
+            self.matches = self._matches_dotted
+
+    def __repr__(self) -> str:
+        return f"Matcher({self.pattern!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Matcher):
+            return self.pattern == other.pattern
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.pattern)
+
+    @property
+    def regex(self) -> Pattern[AnyStr]:
+        if self._regex is None:
+            self._regex = re.compile(self.pattern)
+        return self._regex
+
+    def _matches_any(self, value: AnyStr) -> bool:
+        # '.' doesn't match newlines
+        return ("\n" if isinstance(value, str) else b"\n") not in value
+
+    def _matches_literal(self, value: AnyStr) -> bool:
+        return value == self.literal
+
+    def _matches_dotted(self, value: AnyStr) -> bool:
+        return value == self.literal or self._matches_regex(value)
+
+    def _matches_regex(self, value: AnyStr) -> bool:
+        return self.regex.fullmatch(value) is not None
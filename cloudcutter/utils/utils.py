@@ -2,6 +2,10 @@
 
 import re
 
+from .matcher import Matcher
 
-def matches(pattern: str | bytes, value: str | bytes) -> bool:
+
+def matches(pattern: str | bytes | Matcher, value: str | bytes) -> bool:
+    if isinstance(pattern, Matcher):
+        return pattern.matches(value)
     return bool(re.fullmatch(pattern, value))
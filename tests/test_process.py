@@ -0,0 +1,106 @@
+#  Copyright (c) Kuba Szczodrzyński 2026-10-16.
+
+import asyncio
+import os
+import unittest
+from time import perf_counter
+
+from cloudcutter.modules.base.process import ProcessRunner
+
+
+@unittest.skipUnless(os.name == "posix", "uses POSIX shell commands")
+class ProcessRunnerTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.runner = ProcessRunner()
+
+    async def test_run(self) -> None:
+        result = await self.runner.run("echo", "hello")
+        self.assertEqual(result.stdout, b"hello\n")
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(list(self.runner.history), [result])
+        self.assertEqual(self.runner.stats()["echo"]["count"], 1)
+
+    async def test_check(self) -> None:
+        with self.assertRaises(RuntimeError):
+            await self.runner.run("sh", "-c", "exit 3")
+        result = await self.runner.run("sh", "-c", "exit 3", check=False)
+        self.assertEqual(result.returncode, 3)
+        self.assertFalse(result.ok)
+
+    async def test_timeout(self) -> None:
+        start = perf_counter()
+        with self.assertRaises(TimeoutError):
+            await self.runner.run("sh", "-c", "echo started; sleep 10", timeout=0.3)
+        self.assertLess(perf_counter() - start, 5)
+        (result,) = self.runner.history
+        self.assertTrue(result.timed_out)
+        self.assertEqual(result.stdout, b"started\n")
+        self.assertEqual(self.runner.stats()["sh"]["timeouts"], 1)
+
+    async def test_default_timeout(self) -> None:
+        self.runner.timeout = 0.3
+        with self.assertRaises(TimeoutError):
+            await self.runner.run("sleep", "10")
+
+    async def test_on_output(self) -> None:
+        lines = []
+        result = await self.runner.run(
+            "sh",
+            "-c",
+            "echo first; sleep 0.5; echo second",
+            on_output=lambda line: lines.append((line, perf_counter())),
+        )
+        self.assertEqual([line for line, _ in lines], [b"first\n", b"second\n"])
+        # streamed while the command was still running
+        self.assertGreater(lines[1][1] - lines[0][1], 0.3)
+        self.assertEqual(result.stdout, b"first\nsecond\n")
+
+    async def test_limit(self) -> None:
+        self.runner.limit = 2
+        start = perf_counter()
+        await asyncio.gather(*(self.runner.run("sleep", "0.4") for _ in range(4)))
+        elapsed = perf_counter() - start
+        # two at a time - in two rounds
+        self.assertGreater(elapsed, 0.75)
+        self.assertLess(elapsed, 1.5)
+        self.assertEqual(self.runner._running, 0)
+
+    async def test_batch(self) -> None:
+        results = await self.runner.run_batch(
+            ("echo", "a b"),
+            ("sh", "-c", "echo out; echo err >&2; exit 3"),
+            ("printf", "no newline"),
+            check=False,
+        )
+        self.assertEqual(
+            [(r.args[0], r.returncode, r.stdout, r.stderr) for r in results],
+            [
+                ("echo", 0, b"a b\n", b""),
+                ("sh", 3, b"out\n", b"err\n"),
+                ("printf", 0, b"no newline", b""),
+            ],
+        )
+        # every command is recorded, not the shell running the batch
+        self.assertEqual(list(self.runner.history), results)
+        with self.assertRaises(RuntimeError):
+            await self.runner.run_batch(("true",), ("false",))
+
+    async def test_batch_timeout(self) -> None:
+        start = perf_counter()
+        with self.assertRaises(TimeoutError):
+            await self.runner.run_batch(
+                ("echo", "a"),
+                ("sleep", "10"),
+                ("echo", "b"),
+                timeout=0.5,
+            )
+        # the whole process group is killed, not only the shell
+        self.assertLess(perf_counter() - start, 5)
+        self.assertEqual(
+            [(r.args, r.ok, r.timed_out) for r in self.runner.history],
+            [(("echo", "a"), True, False), (("sleep", "10"), False, True)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()